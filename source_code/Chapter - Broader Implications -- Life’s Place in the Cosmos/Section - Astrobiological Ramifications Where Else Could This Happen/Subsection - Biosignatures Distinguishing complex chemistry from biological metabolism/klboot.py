@@ -19,6 +19,105 @@ def bootstrap_pvalue(obs_p, abiotic_ensemble, n_boot=10000, random_state=None):
     pval = (np.sum(kl_vals >= obs_kl) + 1) / (len(kl_vals) + 1)
     return obs_kl, kl_vals, pval
 
+def _normalize_rows(P, eps=1e-12):
+    # same eps-smoothing and renormalisation as kl_divergence, row-wise
+    P = np.asarray(P, dtype=float) + eps
+    return P / P.sum(axis=-1, keepdims=True)
+
+def kl_divergence_rows(P, q, eps=1e-12):
+    # KL(P_i || q) for every row of P against a single reference q
+    P = _normalize_rows(P, eps)
+    q = _normalize_rows(q, eps)
+    return np.sum(P * (np.log(P) - np.log(q)), axis=-1)
+
+def bootstrap_pvalue_fast(obs_p, abiotic_ensemble, n_boot=10000, random_state=None,
+                          batch=None, eps=1e-12):
+    # Vectorised bootstrap_pvalue (reference mean computed once) plus a resampling
+    # bootstrap of the p-value: each replicate redraws the M realisations with
+    # replacement (multinomial weights) and recomputes the reference mean.
+    rng = np.random.default_rng(random_state)
+    E = np.asarray(abiotic_ensemble, dtype=float)
+    M = E.shape[0]
+    ref = E.mean(axis=0)
+    obs_kl = float(kl_divergence_rows(obs_p, ref, eps))
+    kl_vals = kl_divergence_rows(E, ref, eps)
+    pval = (np.sum(kl_vals >= obs_kl) + 1) / (M + 1)
+    # KL(p_i || q_b) = sum p log p - p @ log q_b ; the first term is shared by all q_b
+    Pn = _normalize_rows(E, eps)
+    negent = np.sum(Pn * np.log(Pn), axis=1)
+    po = _normalize_rows(obs_p, eps)
+    po_negent = np.sum(po * np.log(po))
+    if batch is None:
+        batch = max(1, min(n_boot, 2**25 // max(M, 1)))   # bound the M x batch work array
+    pval_boot = np.empty(n_boot)
+    for start in range(0, n_boot, batch):
+        b = min(batch, n_boot - start)
+        W = rng.multinomial(M, np.full(M, 1.0 / M), size=b)      # (b, M) resample counts
+        logQ = np.log(_normalize_rows(W @ E / M, eps))            # (b, K)
+        obs_b = po_negent - logQ @ po                              # (b,)
+        kl_b = negent[:, None] - Pn @ logQ.T                       # (M, b)
+        exceed = np.sum(W.T * (kl_b >= obs_b), axis=0)
+        pval_boot[start:start + b] = (exceed + 1) / (M + 1)
+    return obs_kl, kl_vals, pval, pval_boot
+
+def bootstrap_pvalue_chunked(obs_p, abiotic_ensemble, chunk=100000, n_boot=10000,
+                             random_state=None, out=None, eps=1e-12):
+    # Two-pass streaming version of bootstrap_pvalue_fast for ensembles larger than RAM.
+    # abiotic_ensemble: (M, K) array, np.memmap, or path to a .npy file (memory-mapped)
+    # out: optional (M,) array/memmap receiving the per-realisation KL values
+    # The multinomial resample of the M realisations is split exactly: counts per
+    # chunk are Multinomial(M, chunk sizes / M), then multinomial within the chunk.
+    # Each chunk's counts come from its own seed, so pass 1 (resampled reference
+    # sums) and pass 2 (weighted exceedance counts) see the same resamples.
+    rng = np.random.default_rng(random_state)
+    if isinstance(abiotic_ensemble, str):
+        abiotic_ensemble = np.load(abiotic_ensemble, mmap_mode='r')
+    E = abiotic_ensemble
+    M, K = E.shape
+    starts = list(range(0, M, chunk))
+    sizes = np.array([min(chunk, M - s) for s in starts])
+    per_chunk = rng.multinomial(M, sizes / M, size=n_boot)           # (n_boot, n_chunks)
+    seeds = np.random.SeedSequence(int(rng.integers(2**63))).spawn(len(starts))
+    batch = max(1, min(n_boot, 2**25 // max(chunk, 1)))              # bound the batch x chunk array
+
+    def resamples(c):
+        # (boot slice, within-chunk counts) in the same order on both passes
+        g = np.random.default_rng(seeds[c])
+        p = np.full(sizes[c], 1.0 / sizes[c])
+        for b0 in range(0, n_boot, batch):
+            b1 = min(b0 + batch, n_boot)
+            yield slice(b0, b1), g.multinomial(per_chunk[b0:b1, c], p)
+
+    ref = np.zeros(K)
+    ref_b = np.zeros((n_boot, K))
+    for c, start in enumerate(starts):
+        Ec = np.asarray(E[start:start + sizes[c]], dtype=float)
+        ref += Ec.sum(axis=0)
+        for sl, W in resamples(c):
+            ref_b[sl] += W @ Ec
+    ref /= M
+    logQ = np.log(_normalize_rows(ref_b / M, eps))                    # (n_boot, K)
+    del ref_b
+    obs_kl = float(kl_divergence_rows(obs_p, ref, eps))
+    po = _normalize_rows(obs_p, eps)
+    obs_b = np.sum(po * np.log(po)) - logQ @ po                      # (n_boot,)
+    kl_vals = out if out is not None else np.empty(M)
+    n_exceed = 0
+    exceed = np.zeros(n_boot)
+    for c, start in enumerate(starts):
+        Ec = E[start:start + sizes[c]]
+        kl = kl_divergence_rows(Ec, ref, eps)
+        n_exceed += int(np.sum(kl >= obs_kl))
+        kl_vals[start:start + len(kl)] = kl
+        Pn = _normalize_rows(Ec, eps)
+        negent = np.sum(Pn * np.log(Pn), axis=1)
+        for sl, W in resamples(c):
+            kl_b = negent[:, None] - Pn @ logQ[sl].T                  # (chunk, b)
+            exceed[sl] += np.sum(W.T * (kl_b >= obs_b[sl]), axis=0)
+    pval = (n_exceed + 1) / (M + 1)
+    pval_boot = (exceed + 1) / (M + 1)
+    return obs_kl, kl_vals, pval, pval_boot
+
 def composite_score(phi, z_iso, eea, d_kl, weights=(1.0,1.0,1.0,1.0)):
     w = np.asarray(weights)
     vals = np.asarray([phi, z_iso, eea, d_kl])
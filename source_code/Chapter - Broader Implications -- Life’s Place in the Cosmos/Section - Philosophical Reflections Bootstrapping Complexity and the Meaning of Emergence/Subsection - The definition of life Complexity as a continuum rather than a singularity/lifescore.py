@@ -1,5 +1,7 @@
 import numpy as np
 import networkx as nx
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
 from math import log, exp
 
 def shannon_normalized(concentrations):
@@ -46,4 +48,72 @@ def compute_life_score(digraph, concentrations, flux_matrix=None, chem_potential
     alpha, beta = sigmoid_params
     L = 1.0 / (1.0 + exp(-alpha * (raw - beta)))
     return {'L': L, 'I': I, 'M': M, 'A': A}
-# Example usage: build catalysis DiGraph, supply concentrations, optional fluxes.
\ No newline at end of file
+
+def scc_fraction_sparse(adjacency):
+    # adjacency: scipy.sparse matrix (or DiGraph) of catalytic edges i->j
+    if isinstance(adjacency, nx.DiGraph):
+        adjacency = nx.to_scipy_sparse_array(adjacency, format='csr')
+    N = adjacency.shape[0]
+    if N == 0:
+        return 0.0
+    _, labels = connected_components(adjacency, directed=True, connection='strong')
+    return np.bincount(labels).max() / N
+
+def entropy_production_sparse(flux_matrix, chem_potentials):
+    # same proxy as entropy_production_estimate, summed over nonzero fluxes only
+    J = sp.coo_array(flux_matrix)
+    mu = np.asarray(chem_potentials)
+    return max(0.0, float(np.sum(J.data * (mu[J.row] - mu[J.col]))))
+
+def _activity(ep):
+    return np.tanh(ep / (1.0 + ep))
+
+def compute_life_score_sparse(adjacency, concentrations, flux_matrix=None, chem_potentials=None,
+                              weights=None, sigmoid_params=(10.0, 0.5)):
+    # compute_life_score for sparse adjacency/flux matrices
+    if weights is None:
+        weights = np.array([0.4, 0.4, 0.2])
+    I = shannon_normalized(np.asarray(concentrations))
+    M = scc_fraction_sparse(adjacency)
+    if flux_matrix is None or chem_potentials is None:
+        A = 0.0
+    else:
+        A = _activity(entropy_production_sparse(flux_matrix, chem_potentials))
+    raw = np.dot(weights, np.array([I, M, A]))
+    alpha, beta = sigmoid_params
+    L = 1.0 / (1.0 + exp(-alpha * (raw - beta)))
+    return {'L': L, 'I': I, 'M': M, 'A': A}
+
+def score_trajectory(adjacency, concentrations, fluxes=None, chem_potentials=None,
+                     weights=None, sigmoid_params=(10.0, 0.5)):
+    # Batch life scores for T saved snapshots.
+    # adjacency: one sparse matrix (static network, SCCs computed once) or a list of T
+    # concentrations: (T, N) array
+    # fluxes: list of T sparse flux matrices, or None
+    # chem_potentials: (N,) or (T, N) array, or None
+    # returns dict of (T,) arrays with keys 'L', 'I', 'M', 'A'
+    if weights is None:
+        weights = np.array([0.4, 0.4, 0.2])
+    C = np.asarray(concentrations, dtype=float)
+    T, N = C.shape
+    # vectorised normalized Shannon entropy over rows
+    total = C.sum(axis=1, keepdims=True)
+    P = np.divide(C, total, out=np.zeros_like(C), where=total > 0)
+    logP = np.log(P, out=np.zeros_like(P), where=P > 0)
+    I = -np.sum(P * logP, axis=1) / np.log(N)
+    if isinstance(adjacency, (list, tuple)):
+        M = np.array([scc_fraction_sparse(a) for a in adjacency])
+    else:
+        M = np.full(T, scc_fraction_sparse(adjacency))
+    if fluxes is None or chem_potentials is None:
+        A = np.zeros(T)
+    else:
+        mu = np.broadcast_to(np.asarray(chem_potentials, dtype=float), (T, N))
+        ep = np.array([entropy_production_sparse(J, mu[t]) for t, J in enumerate(fluxes)])
+        A = _activity(ep)
+    raw = weights[0] * I + weights[1] * M + weights[2] * A
+    alpha, beta = sigmoid_params
+    L = 1.0 / (1.0 + np.exp(-alpha * (raw - beta)))
+    return {'L': L, 'I': I, 'M': M, 'A': A}
+# Example usage: build catalysis DiGraph, supply concentrations, optional fluxes.
+# For large networks pass scipy.sparse adjacency/flux matrices to score_trajectory.
\ No newline at end of file
@@ -30,6 +30,67 @@ def run_sim(params, y0, t_span=(0,1000.0)):
     division_times = sol.t[div_idx] if div_idx.size else np.array([])
     return sol.t, A_t, V_t, c_t, sigma_t, division_times
 
+def population_rhs(t, y, params):
+    """Vectorised model() for n cells; y = [A_1..A_n, V_1..V_n, c_1..c_n]."""
+    A, V, delta_c = y.reshape(3, -1)
+    R = np.sqrt(A / (4*np.pi))
+    sigma = params['K_a'] * (A - params['A0']) / params['A0']
+    delta_pi = params['Rgas']*params['T']*delta_c
+    Jw = params['L_p'] * (delta_pi - 2*sigma / R)
+    return np.concatenate([params['k_a'] * A, A * Jw, np.full(A.shape, params['k_prod'])])
+
+def run_population(params, y0, t_span=(0, 3600.0), max_cells=10000, split_sd=0.05,
+                   seed=None, rtol=1e-6, atol=None):
+    """
+    Grow a colony from one cell. A terminal event stops the integrator exactly when
+    the most-stretched cell reaches sigma_crit; that cell splits its area and volume
+    into fractions f, 1-f with f ~ N(0.5, split_sd) (delta_c is intensive and is
+    inherited) and integration resumes for the whole population in one RHS.
+    Returns dict with 'A', 'V', 'c' (living cells at the end), 'ids', 'n_t' (event
+    times, population size) and lineage arrays 'parent', 'birth', 'division'
+    indexed by cell id (division is nan for cells still alive).
+    """
+    rng = np.random.default_rng(seed)
+    A, V, c = (np.array([v], dtype=float) for v in y0)
+    ids = np.array([0])
+    parent, birth, division = [-1], [t_span[0]], [np.nan]
+    # absolute tolerances scaled to each variable's magnitude (A ~ 1e-11, V ~ 1e-18)
+    scale = np.abs(np.asarray(y0, dtype=float))
+    scale[scale == 0] = 1.0
+    atol_cell = 1e-6 * scale if atol is None else np.broadcast_to(atol, (3,))
+    sigma_of = lambda A: params['K_a'] * (A - params['A0']) / params['A0']
+    event = lambda t, y, params: np.max(sigma_of(y[:len(y)//3])) - params['sigma_crit']
+    event.terminal, event.direction = True, 1
+    t = t_span[0]
+    n_t = [(t, 1)]
+    while t < t_span[1] and len(ids) < max_cells:
+        n = len(ids)
+        sol = solve_ivp(population_rhs, (t, t_span[1]), np.concatenate([A, V, c]),
+                        args=(params,), events=event, rtol=rtol,
+                        atol=np.repeat(atol_cell, n))
+        t = sol.t[-1]
+        A, V, c = sol.y[:, -1].reshape(3, -1).copy()
+        if sol.status != 1:
+            break
+        # every cell at (or numerically at) threshold divides at this event
+        div = np.flatnonzero(sigma_of(A) >= params['sigma_crit'] * (1 - 1e-6))
+        f = np.clip(rng.normal(0.5, split_sd, size=len(div)), 0.05, 0.95)
+        new_ids = len(parent) + np.arange(2 * len(div))
+        for i in div:
+            division[ids[i]] = t
+            parent += [ids[i], ids[i]]
+            birth += [t, t]
+            division += [np.nan, np.nan]
+        keep = np.setdiff1d(np.arange(n), div)
+        A = np.concatenate([A[keep], f * A[div], (1 - f) * A[div]])
+        V = np.concatenate([V[keep], f * V[div], (1 - f) * V[div]])
+        c = np.concatenate([c[keep], c[div], c[div]])
+        ids = np.concatenate([ids[keep], new_ids[0::2], new_ids[1::2]])
+        n_t.append((t, len(ids)))
+    return {'A': A, 'V': V, 'c': c, 'ids': ids, 'n_t': np.array(n_t),
+            'parent': np.array(parent), 'birth': np.array(birth),
+            'division': np.array(division)}
+
 # Example parameters for an oleic-acid protocell (order-of-magnitude)
 params = {
     'L_p': 1e-6,        # m s^-1 Pa^-1
@@ -43,4 +104,6 @@ params = {
 }
 y0 = [3.14e-11, 4.19e-18, 0.0]  # A, V (1 um radius), delta_c initial
 t, A, V, c, sigma, div_times = run_sim(params, y0, t_span=(0,3600))
-# Results ready for plotting or further analysis (not shown).
\ No newline at end of file
+# Results ready for plotting or further analysis (not shown).
+# Colony with exact division events and lineage tree:
+# colony = run_population(params, y0, t_span=(0, 2e5), max_cells=10000, seed=1)
\ No newline at end of file
@@ -1,3 +1,4 @@
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 def expected_cost(code_map, codon_freq, mut_matrix, dist_matrix):
@@ -21,5 +22,188 @@ def expected_cost(code_map, codon_freq, mut_matrix, dist_matrix):
     term = codon_freq[:, None] * mut_matrix * d_c
     return float(term.sum())
 
-# Example usage (toy arrays not shown): generate random code_map permutations
-# and compare expected_cost to canonical mapping to compute z-score.
\ No newline at end of file
+# --- Code-permutation engine ---------------------------------------------------
+# Alternative codes keep the block structure of code_map (the sets of codons that
+# share an amino acid) and reassign amino acids to blocks. E[f] then collapses to
+#   E = sum_{k,l} B[k,l] d(a_k, a_l),  B[k,l] = sum_{c in k, c' in l} q(c) P(c->c')
+# where a_k is the amino acid on block k. B only couples blocks linked by a
+# mutation, so costs are evaluated on its nonzero (k, l, w) triplets and a swap of
+# two blocks only touches their rows and columns of B.
+
+def block_coupling(code_map, codon_freq, mut_matrix):
+    """
+    Collapse the codon-level error weights onto amino-acid blocks.
+    Returns (labels, B, triplets): labels[k] is the amino acid of block k in
+    code_map, B the dense block coupling matrix and triplets = (k, l, w) its
+    nonzero entries.
+    """
+    if code_map.shape[0] != mut_matrix.shape[0] or codon_freq.shape[0] != mut_matrix.shape[0]:
+        raise ValueError("Inconsistent codon dimensions")
+    labels, block = np.unique(code_map, return_inverse=True)
+    c, c2 = np.nonzero(mut_matrix)
+    B = np.zeros((len(labels), len(labels)))
+    np.add.at(B, (block[c], block[c2]), codon_freq[c] * mut_matrix[c, c2])
+    k, l = np.nonzero(B)
+    return labels, B, (k, l, B[k, l])
+
+def block_cost(assign, triplets, dist_matrix):
+    # E for one assignment (nb,) or a batch (m, nb) of amino acids per block
+    k, l, w = triplets
+    assign = np.asarray(assign)
+    return dist_matrix[assign[..., k], assign[..., l]] @ w
+
+def swap_delta(assign, i, j, B, dist_matrix):
+    # change in E when blocks i and j exchange amino acids; only rows and
+    # columns i, j of B contribute, so this is O(nb)
+    new = assign.copy()
+    new[i], new[j] = assign[j], assign[i]
+    rows = [i, j]
+    d = np.sum(B[rows] * (dist_matrix[new[rows]][:, new] - dist_matrix[assign[rows]][:, assign]))
+    mask = np.ones(len(assign), dtype=bool)
+    mask[rows] = False
+    am = assign[mask]
+    d += np.sum(B[mask][:, rows] * (dist_matrix[am][:, new[rows]] - dist_matrix[am][:, assign[rows]]))
+    return d
+
+def random_codes(n, labels, fixed=(), rng=None):
+    # n random reassignments of labels to blocks; amino acids in `fixed` stay put
+    rng = np.random.default_rng(rng)
+    free = ~np.isin(labels, fixed)
+    codes = np.tile(labels, (n, 1))
+    codes[:, free] = rng.permuted(codes[:, free], axis=1)
+    return codes
+
+def _sample_chunk(args):
+    n, labels, fixed, triplets, dist_matrix, seed, batch = args
+    rng = np.random.default_rng(seed)
+    out = np.empty(n)
+    for s in range(0, n, batch):
+        m = min(batch, n - s)
+        out[s:s + m] = block_cost(random_codes(m, labels, fixed, rng), triplets, dist_matrix)
+    return out
+
+def sample_costs(n_codes, labels, triplets, dist_matrix, fixed=(), seed=None,
+                 workers=None, n_chunks=None, batch=20000):
+    """
+    Costs of n_codes random alternative codes (10^7 is routine), drawn in
+    parallel chunks with independent SeedSequence streams.
+    """
+    n_chunks = n_chunks or max(1, min(64, n_codes // batch))
+    sizes = np.full(n_chunks, n_codes // n_chunks)
+    sizes[:n_codes % n_chunks] += 1
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    jobs = [(int(m), labels, fixed, triplets, dist_matrix, s, batch) for m, s in zip(sizes, seeds)]
+    if n_chunks == 1 or workers == 1:
+        return np.concatenate([_sample_chunk(j) for j in jobs])
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return np.concatenate(list(ex.map(_sample_chunk, jobs)))
+
+def hill_climb(assign, B, dist_matrix, triplets, fixed=()):
+    # steepest descent over all block swaps until no swap lowers E
+    assign = np.array(assign)
+    free = np.flatnonzero(~np.isin(assign, fixed))
+    pairs = [(i, j) for a, i in enumerate(free) for j in free[a + 1:]]
+    while True:
+        deltas = [swap_delta(assign, i, j, B, dist_matrix) for i, j in pairs]
+        best = int(np.argmin(deltas))
+        if deltas[best] >= -1e-15:
+            break
+        i, j = pairs[best]
+        assign[[i, j]] = assign[[j, i]]
+    return assign, block_cost(assign, triplets, dist_matrix)
+
+def anneal(assign, B, dist_matrix, triplets, fixed=(), n_steps=20000, T0=None,
+           T1=None, rng=None):
+    """
+    Simulated annealing with random block swaps and a geometric schedule from T0
+    to T1 (defaults scale with the typical |delta| of a swap). Returns the best
+    assignment seen and its cost.
+    """
+    rng = np.random.default_rng(rng)
+    assign = np.array(assign)
+    free = np.flatnonzero(~np.isin(assign, fixed))
+    E = block_cost(assign, triplets, dist_matrix)
+    if T0 is None or T1 is None:
+        probe = [abs(swap_delta(assign, *rng.choice(free, 2, replace=False), B, dist_matrix))
+                 for _ in range(50)]
+        scale = np.mean(probe)
+        T0 = scale if T0 is None else T0
+        T1 = 1e-3 * scale if T1 is None else T1
+    cool = (T1 / T0) ** (1.0 / max(n_steps - 1, 1))
+    best, E_best, T = assign.copy(), E, T0
+    for _ in range(n_steps):
+        i, j = rng.choice(free, 2, replace=False)
+        d = swap_delta(assign, i, j, B, dist_matrix)
+        if d <= 0 or rng.random() < np.exp(-d / T):
+            assign[[i, j]] = assign[[j, i]]
+            E += d
+            if E < E_best:
+                best, E_best = assign.copy(), E
+        T *= cool
+    return best, block_cost(best, triplets, dist_matrix)
+
+def _optimize_one(args):
+    method, labels, B, dist_matrix, triplets, fixed, seed, kw = args
+    rng = np.random.default_rng(seed)
+    start = random_codes(1, labels, fixed, rng)[0]
+    if method == 'anneal':
+        return anneal(start, B, dist_matrix, triplets, fixed, rng=rng, **kw)
+    if method == 'hill':
+        return hill_climb(start, B, dist_matrix, triplets, fixed)
+    raise ValueError(f"unknown method {method!r}")
+
+def optimize_codes(method, n_runs, labels, B, triplets, dist_matrix, fixed=(),
+                   seed=None, workers=None, **kw):
+    """
+    Independent 'hill' or 'anneal' runs from random starting codes, in parallel.
+    Returns (assignments[n_runs, nb], costs[n_runs]).
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n_runs)
+    jobs = [(method, labels, B, dist_matrix, triplets, fixed, s, kw) for s in seeds]
+    if n_runs == 1 or workers == 1:
+        runs = [_optimize_one(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            runs = list(ex.map(_optimize_one, jobs))
+    return np.array([a for a, _ in runs]), np.array([e for _, e in runs])
+
+def z_scores(costs, reference):
+    # z-scores of costs against the random-code distribution `reference`
+    return (np.asarray(costs) - reference.mean()) / reference.std()
+
+if __name__ == "__main__":
+    # Standard code, 61 sense codons, single-point errors weighted equally and
+    # squared polar-requirement differences as the amino-acid distance.
+    bases = "TCAG"
+    table = "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG"
+    polar = dict(A=7.0, R=9.1, N=10.0, D=13.0, C=4.8, Q=8.6, E=12.5, G=7.9, H=8.4,
+                 I=4.9, L=4.9, K=10.1, M=5.3, F=5.0, P=6.6, S=7.5, T=6.6, W=5.2,
+                 Y=5.4, V=5.6)
+    aas = sorted(polar)
+    codons = [a + b + c for a in bases for b in bases for c in bases]
+    sense = [(c, aa) for c, aa in zip(codons, table) if aa != '*']
+    index = {c: i for i, (c, _) in enumerate(sense)}
+    code_map = np.array([aas.index(aa) for _, aa in sense])
+    mut = np.zeros((len(sense), len(sense)))
+    for c, _ in sense:
+        for pos in range(3):
+            for b in bases:
+                c2 = c[:pos] + b + c[pos + 1:]
+                if c2 != c and c2 in index:
+                    mut[index[c], index[c2]] = 1.0 / 9.0
+    q = np.full(len(sense), 1.0 / len(sense))
+    pr = np.array([polar[a] for a in aas])
+    dist = (pr[:, None] - pr[None, :]) ** 2
+
+    canonical = expected_cost(code_map, q, mut, dist)
+    labels, B, triplets = block_coupling(code_map, q, mut)
+    assert np.isclose(block_cost(labels, triplets, dist), canonical)
+
+    costs = sample_costs(10**6, labels, triplets, dist, seed=1)
+    print(f"canonical E = {canonical:.4f}; random codes {costs.mean():.4f} +- {costs.std():.4f}")
+    print(f"z = {z_scores(canonical, costs):.2f}, fraction better = {np.mean(costs < canonical):.2e}")
+
+    _, e_hill = optimize_codes('hill', 16, labels, B, triplets, dist, seed=2)
+    _, e_anneal = optimize_codes('anneal', 8, labels, B, triplets, dist, seed=3)
+    print(f"hill climbing: best E = {e_hill.min():.4f} (z = {z_scores(e_hill.min(), costs):.2f})")
+    print(f"annealing:     best E = {e_anneal.min():.4f} (z = {z_scores(e_anneal.min(), costs):.2f})")
@@ -9,13 +9,14 @@ division_threshold = 2 * N_init  # molecule count triggering division
 migration_rate = 0.01            # probability per molecule to migrate per step
 timesteps = 10000
 
-# Initialize vesicles: fraction 0.1 cooperators randomly
-vesicles = [np.random.binomial(N_init, 0.1, size=1)[0] for _ in range(num_vesicles)]
-# Track composition as tuple (n_cooperators, n_defectors)
-pop = [(int(n), N_init-int(n)) for n in vesicles]
-
 rng = np.random.default_rng(42)
 
+def initial_pop(num_vesicles=num_vesicles):
+    # Initialize vesicles: fraction 0.1 cooperators randomly
+    vesicles = rng.binomial(N_init, 0.1, size=num_vesicles)
+    # Track composition as tuple (n_cooperators, n_defectors)
+    return [(int(n), N_init-int(n)) for n in vesicles]
+
 def step(pop):
     new_pop = []
     for nC, nD in pop:
@@ -29,7 +30,7 @@ def step(pop):
         rates = np.array([wC, wD])
         rates /= rates.sum()
         # multinomial births conserving expected N; small stochasticity via Poisson
-        births = rng.multinomial(np.random.poisson(1), rates)
+        births = rng.multinomial(rng.poisson(1), rates)
         nC += births[0]; nD += births[1]
         # migration: simple exchange with global pool
         migrantsC = rng.binomial(nC, migration_rate)
@@ -41,32 +42,107 @@ def step(pop):
     # (left as an exercise to implement exact mass conservation)
     return new_pop
 
-# Main loop with simple division rule
-for t in range(timesteps):
-    pop = step(pop)
-    # vesicle growth and division according to vesicle fitness W_g = 1 + B*x
-    updated = []
-    for nC, nD in pop:
-        N = nC + nD
-        if N == 0:
-            updated.append((0,0)); continue
-        x = nC / N
-        # expected growth proportional to W_g
-        growth_factor = 1.0 + B * x
-        # stochastic growth
-        added = rng.poisson((growth_factor-1.0)*N)
-        # distribute added molecules proportional to current composition
-        if N>0 and added>0:
-            addC = rng.binomial(added, x)
-            nC += int(addC); nD += int(added - addC)
-        # division if above threshold
-        if nC + nD >= division_threshold:
-            # bottleneck: split molecules randomly into two daughters
-            total = nC + nD
-            draw = rng.hypergeometric(nC, nD, total//2)
-            updated.append((int(draw), int(total//2 - draw)))
-            updated.append((nC - int(draw), nD - int(total//2 - draw)))
-        else:
-            updated.append((nC, nD))
-    pop = updated
-# At this point analyze pop composition distributions for cooperation prevalence.
\ No newline at end of file
+# Structure-of-arrays version: nC, nD are integer vectors over all vesicles
+def step_soa(nC, nD, rng):
+    # births, migration and exact-mass-conserving redistribution of migrants
+    N = nC + nD
+    alive = N > 0
+    x = np.divide(nC, N, out=np.zeros(len(N)), where=alive)
+    wC = 1.0 - cost + benefit * x
+    wD = 1.0 + benefit * x
+    births = np.where(alive, rng.poisson(1, size=len(N)), 0)
+    bC = rng.binomial(births, wC / (wC + wD))
+    nC = nC + bC
+    nD = nD + births - bC
+    mC = rng.binomial(nC, migration_rate)
+    mD = rng.binomial(nD, migration_rate)
+    nC -= mC; nD -= mD
+    # pooled migrants land uniformly on vesicles; totals are conserved exactly
+    uniform = np.full(len(N), 1.0 / len(N))
+    nC += rng.multinomial(mC.sum(), uniform)
+    nD += rng.multinomial(mD.sum(), uniform)
+    return nC, nD
+
+def grow_and_divide_soa(nC, nD, rng, max_vesicles=None):
+    # vesicle growth W_g = 1 + B*x, hypergeometric division, then compaction
+    N = nC + nD
+    x = np.divide(nC, N, out=np.zeros(len(N)), where=N > 0)
+    added = rng.poisson(B * x * N)
+    addC = rng.binomial(added, x)
+    nC = nC + addC
+    nD = nD + added - addC
+    # repeat divisions until no vesicle is above threshold (fast growers may need several)
+    while True:
+        total = nC + nD
+        div = np.flatnonzero(total >= division_threshold)
+        if len(div) == 0:
+            break
+        half = total[div] // 2
+        draw = rng.hypergeometric(nC[div], nD[div], half)
+        # second daughters are appended; first daughters overwrite the parent slot
+        nC2, nD2 = nC[div] - draw, nD[div] - (half - draw)
+        nC[div], nD[div] = draw, half - draw
+        nC = np.concatenate([nC, nC2])
+        nD = np.concatenate([nD, nD2])
+    keep = (nC + nD) > 0
+    nC, nD = nC[keep], nD[keep]
+    if max_vesicles is not None and len(nC) > max_vesicles:
+        # fixed carrying capacity: uniform random culling
+        idx = rng.choice(len(nC), size=max_vesicles, replace=False)
+        nC, nD = nC[idx], nD[idx]
+    return nC, nD
+
+def simulate_soa(num_vesicles=num_vesicles, timesteps=timesteps, max_vesicles=10**5,
+                 record_every=100, seed=42):
+    # returns final (nC, nD) and recorded (t, mean cooperator fraction, n_vesicles);
+    # the population doubles every few steps, so max_vesicles=None is only for short runs
+    if max_vesicles is None and timesteps > 50:
+        raise ValueError("unbounded population: set max_vesicles for runs over 50 steps")
+    rng = np.random.default_rng(seed)
+    nC = rng.binomial(N_init, 0.1, size=num_vesicles)
+    nD = N_init - nC
+    history = []
+    for t in range(timesteps):
+        nC, nD = step_soa(nC, nD, rng)
+        nC, nD = grow_and_divide_soa(nC, nD, rng, max_vesicles)
+        if t % record_every == 0:
+            history.append((t, nC.sum() / max((nC + nD).sum(), 1), len(nC)))
+    return nC, nD, np.array(history)
+
+def simulate_legacy(pop, timesteps=timesteps):
+    # Main loop with simple division rule
+    for t in range(timesteps):
+        pop = step(pop)
+        # vesicle growth and division according to vesicle fitness W_g = 1 + B*x
+        updated = []
+        for nC, nD in pop:
+            N = nC + nD
+            if N == 0:
+                updated.append((0,0)); continue
+            x = nC / N
+            # expected growth proportional to W_g
+            growth_factor = 1.0 + B * x
+            # stochastic growth
+            added = rng.poisson((growth_factor-1.0)*N)
+            # distribute added molecules proportional to current composition
+            if N>0 and added>0:
+                addC = rng.binomial(added, x)
+                nC += int(addC); nD += int(added - addC)
+            # division if above threshold
+            if nC + nD >= division_threshold:
+                # bottleneck: split molecules randomly into two daughters
+                total = nC + nD
+                draw = rng.hypergeometric(nC, nD, total//2)
+                updated.append((int(draw), int(total//2 - draw)))
+                updated.append((nC - int(draw), nD - int(total//2 - draw)))
+            else:
+                updated.append((nC, nD))
+        pop = updated
+    return pop
+
+if __name__ == "__main__":
+    # run at a fixed carrying capacity of 5000 vesicles
+    nC, nD, history = simulate_soa(num_vesicles=num_vesicles, timesteps=2000,
+                                   max_vesicles=5000, record_every=200)
+    for t, frac, n in history:
+        print(f"t={int(t):5d}  cooperator fraction {frac:.3f}  vesicles {int(n)}")
\ No newline at end of file
@@ -51,12 +51,109 @@ def step(comps):
     random.shuffle(new_comps)
     return new_comps[:N_compartments]
 
-# Run and record lineage persistence metric
-lineage_of_interest = 0
-history = []
-for t in range(steps):
-    comps = step(comps)
-    # fraction of compartments containing lineage_of_interest
-    frac = sum(1 for c in comps if lineage_of_interest in c['templates']) / N_compartments
-    history.append(frac)
+def run_legacy(comps, steps=steps, lineage_of_interest=0):
+    # Run and record lineage persistence metric
+    history = []
+    for t in range(steps):
+        comps = step(comps)
+        # fraction of compartments containing lineage_of_interest
+        frac = sum(1 for c in comps if lineage_of_interest in c['templates']) / N_compartments
+        history.append(frac)
+    return comps, history
+
+# Sparse state: COO triplets (compartment, lineage, count) over a compartment x lineage
+# matrix, kept as unique pairs sorted by key = compartment * n_lineages + lineage with
+# count > 0. A pair only appears or vanishes through transfer, division or culling,
+# so occ[l] (compartments holding lineage l) is updated from those entries alone.
+def compact(comp, lin, cnt, n_lineages):
+    # merge duplicate entries and drop zeros
+    nz = cnt > 0
+    key = comp[nz] * n_lineages + lin[nz]
+    ukey, inv = np.unique(key, return_inverse=True)
+    merged = np.bincount(inv, weights=cnt[nz]).astype(np.int64)
+    return ukey // n_lineages, ukey % n_lineages, merged
+
+def _drop_empty(comp, lin, cnt, occ):
+    gone = cnt == 0
+    occ -= np.bincount(lin[gone], minlength=len(occ))
+    return comp[~gone], lin[~gone], cnt[~gone]
+
+def step_sparse(comp, lin, cnt, n_comp, occ, rng):
+    # one step on a compacted state; occ is updated in place
+    L = len(occ)
+    # replication: counts only grow, occupancy unchanged
+    cnt = cnt + rng.binomial(cnt, 1 - np.exp(-r_replication*dt))
+    # horizontal transfer: each (compartment, lineage) bundle moves to one random compartment
+    n_tr = rng.binomial(cnt, 1 - np.exp(-h_transfer*dt))
+    moved = np.flatnonzero(n_tr)
+    if len(moved):
+        cnt = cnt - n_tr
+        t_key, inv = np.unique(rng.integers(0, n_comp, size=len(moved)) * L + lin[moved],
+                               return_inverse=True)
+        t_cnt = np.bincount(inv, weights=n_tr[moved]).astype(np.int64)
+        key = comp * L + lin
+        pos = np.searchsorted(key, t_key)
+        hit = pos < len(key)
+        hit[hit] = key[pos[hit]] == t_key[hit]
+        cnt[pos[hit]] += t_cnt[hit]
+        comp, lin, cnt = _drop_empty(comp, lin, cnt, occ)
+        # pairs new to their compartment are inserted in key order
+        new_key, new_cnt = t_key[~hit], t_cnt[~hit]
+        occ += np.bincount(new_key % L, minlength=L)
+        key = comp * L + lin
+        at = np.searchsorted(key, new_key)
+        key, cnt = np.insert(key, at, new_key), np.insert(cnt, at, new_cnt)
+        comp, lin = key // L, key % L
+    # division: child A keeps the parent id, child B gets a new id (above all current
+    # ids and increasing with the parent, so appended entries stay sorted)
+    totals = np.bincount(comp, weights=cnt, minlength=n_comp)
+    div = totals >= division_threshold
+    new_id = np.full(n_comp, -1, dtype=np.int64)
+    new_id[div] = n_comp + np.arange(div.sum())
+    sel = np.flatnonzero(div[comp])
+    a = rng.binomial(cnt[sel], 0.5)
+    b = cnt[sel] - a
+    cnt[sel] = a
+    child = sel[b > 0]
+    occ += np.bincount(lin[child], minlength=L)
+    comp = np.concatenate([comp, new_id[comp[child]]])
+    lin = np.concatenate([lin, lin[child]])
+    cnt = np.concatenate([cnt, b[b > 0]])
+    comp, lin, cnt = _drop_empty(comp, lin, cnt, occ)
+    n_total = n_comp + int(div.sum())
+    # fixed population: keep a random subset of compartments; the index map is
+    # increasing, so keys stay sorted
+    if n_total > N_compartments:
+        keep = np.sort(rng.choice(n_total, size=N_compartments, replace=False))
+        remap = np.full(n_total, -1, dtype=np.int64)
+        remap[keep] = np.arange(N_compartments)
+        comp = remap[comp]
+        alive = comp >= 0
+        occ -= np.bincount(lin[~alive], minlength=L)
+        comp, lin, cnt = comp[alive], lin[alive], cnt[alive]
+        n_total = N_compartments
+    return comp, lin, cnt, n_total
+
+def simulate_sparse(steps=steps, n_lineages=N_compartments, lineage_of_interest=0, seed=None):
+    # lineages are seeded round-robin over compartments, init_templates copies each
+    rng = np.random.default_rng(seed)
+    lin = np.arange(n_lineages, dtype=np.int64)
+    comp, lin, cnt = compact(lin % N_compartments, lin,
+                             np.full(n_lineages, init_templates, dtype=np.int64), n_lineages)
+    occ = np.bincount(lin, minlength=n_lineages)   # compartments holding each lineage
+    n_comp = N_compartments
+    history = np.zeros(steps)
+    occupancy_sum = np.zeros(n_lineages)   # running sum of per-lineage occupied fraction
+    last_seen = np.full(n_lineages, -1)    # last step at which each lineage was present
+    for t in range(steps):
+        comp, lin, cnt, n_comp = step_sparse(comp, lin, cnt, n_comp, occ, rng)
+        occupancy_sum += occ / N_compartments
+        last_seen[occ > 0] = t
+        history[t] = occ[lineage_of_interest] / N_compartments
+    return {'history': history, 'mean_occupancy': occupancy_sum / steps,
+            'last_seen': last_seen, 'state': (comp, lin, cnt, n_comp)}
+
+if __name__ == "__main__":
+    result = simulate_sparse(n_lineages=2000, seed=0)
+    history = result['history']
 # 'history' contains temporal signal of vertical persistence for analysis
\ No newline at end of file
@@ -1,4 +1,5 @@
-import random, math, collections
+import random, collections
+import numpy as np
 # Parameters
 M = 4                    # alphabet size (A,C,G,U)
 L0 = 6                   # target polymer length
@@ -7,46 +8,115 @@ k_s = 1e-4               # spontaneous ligation rate
 k_t = 1e-2               # templated extension rate (effective)
 steps = 100000
 
-# Pools and templates
-pool = collections.Counter({'A':1000,'C':1000,'G':1000,'U':1000})
-templates = ['A'*L0]     # initial seed template
-
-seq_counts = collections.Counter()
-
-for t in range(steps):
-    # spontaneous formation attempt
-    if random.random() < k_s:
-        seq = ''.join(random.choices(list(pool.keys()), k=L0))
-        seq_counts[seq]+=1
-    # templated extension attempt
-    if random.random() < k_t and templates:
-        templ = random.choice(templates)
-        # build copy with fidelity q per site
-        copy = []
-        for base in templ:
-            if random.random() < q:
-                # correct complement (simple A<->U, C<->G mapping)
-                comp = {'A':'U','U':'A','C':'G','G':'C'}[base]
-                copy.append(comp)
-            else:
-                copy.append(random.choice(list(pool.keys())))
-        seq = ''.join(copy)
-        seq_counts[seq]+=1
-        # allow successful copies to act as new templates probabilistically
-        if random.random() < 0.01:
-            templates.append(seq)
-
-# Report top sequences and site entropies
-top = seq_counts.most_common(10)
-print("Top sequences:", top)
-# compute site entropies
-pos_counts = [collections.Counter() for _ in range(L0)]
-for s,c in seq_counts.items():
-    for i,ch in enumerate(s):
-        pos_counts[i][ch]+=c
-ents = []
-for pc in pos_counts:
-    total = sum(pc.values())
-    H = -sum((v/total)*math.log(v/total,2) for v in pc.values())
-    ents.append(H)
-print("Site entropies (bits):", ents)
\ No newline at end of file
+def simulate_legacy(steps=steps, L0=L0):
+    # Pools and templates
+    pool = collections.Counter({'A':1000,'C':1000,'G':1000,'U':1000})
+    templates = ['A'*L0]     # initial seed template
+
+    seq_counts = collections.Counter()
+
+    for t in range(steps):
+        # spontaneous formation attempt
+        if random.random() < k_s:
+            seq = ''.join(random.choices(list(pool.keys()), k=L0))
+            seq_counts[seq]+=1
+        # templated extension attempt
+        if random.random() < k_t and templates:
+            templ = random.choice(templates)
+            # build copy with fidelity q per site
+            copy = []
+            for base in templ:
+                if random.random() < q:
+                    # correct complement (simple A<->U, C<->G mapping)
+                    comp = {'A':'U','U':'A','C':'G','G':'C'}[base]
+                    copy.append(comp)
+                else:
+                    copy.append(random.choice(list(pool.keys())))
+            seq = ''.join(copy)
+            seq_counts[seq]+=1
+            # allow successful copies to act as new templates probabilistically
+            if random.random() < 0.01:
+                templates.append(seq)
+    return seq_counts
+
+# Vectorised version. Bases are uint8 codes A, C, G, U = 0..3. Copies are i.i.d.
+# given the template set, and each becomes a template with probability p_template,
+# so the copies between two template additions (a geometric block) are drawn at
+# once; the totals of spontaneous and templated events over all steps are
+# binomial. This samples the same process as simulate_legacy.
+BASES = np.array(list('ACGU'))
+COMP = np.array([3, 2, 1, 0], dtype=np.uint8)    # A<->U, C<->G
+
+def encode(seqs):
+    # base-4 integer hash of each row (L <= 31 fits in int64)
+    seqs = np.atleast_2d(seqs)
+    return seqs.astype(np.int64) @ (4 ** np.arange(seqs.shape[1] - 1, -1, -1, dtype=np.int64))
+
+def decode(codes, L):
+    shifts = 2 * np.arange(L - 1, -1, -1, dtype=np.int64)
+    return ((np.asarray(codes, dtype=np.int64)[:, None] >> shifts) & 3).astype(np.uint8)
+
+def count_sequences(seqs):
+    # unique sequences and counts; integer hashes when they fit, row-wise unique otherwise
+    if seqs.shape[1] <= 31:
+        codes, counts = np.unique(encode(seqs), return_counts=True)
+        return decode(codes, seqs.shape[1]), counts
+    return np.unique(seqs, axis=0, return_counts=True)
+
+def site_entropies(pos_base):
+    # Shannon entropy (bits) of each row of a position x base count matrix
+    p = pos_base / pos_base.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -np.sum(np.where(p > 0, p * np.log2(p), 0.0), axis=1)
+
+def simulate_vectorised(steps=steps, L0=L0, q=q, k_s=k_s, k_t=k_t, p_template=0.01,
+                        seed=None, keep_sequences=True):
+    """
+    Returns (seqs, counts, pos_base, templates): unique sequences (uint8 rows)
+    with their counts (None unless keep_sequences), the position x base count
+    matrix over all products and the final template array.
+    """
+    rng = np.random.default_rng(seed)
+    pos_base = np.zeros((L0, M), dtype=np.int64)
+    offsets = (np.arange(L0) * M)[None, :]
+    products = []
+
+    def record(s):
+        pos_base[:] += np.bincount((offsets + s).ravel(), minlength=L0 * M).reshape(L0, M)
+        if keep_sequences:
+            products.append(s)
+
+    record(rng.integers(0, M, size=(rng.binomial(steps, k_s), L0), dtype=np.uint8))
+    templates = np.zeros((64, L0), dtype=np.uint8)    # grows by doubling
+    n_templ = 1                                       # seed template 'A'*L0
+    remaining = rng.binomial(steps, k_t)
+    while remaining > 0:
+        gap = rng.geometric(p_template)
+        g = min(gap, remaining)
+        T = templates[rng.integers(0, n_templ, g)]
+        ok = rng.random((g, L0)) < q
+        copies = np.where(ok, COMP[T], rng.integers(0, M, size=(g, L0), dtype=np.uint8))
+        record(copies)
+        if gap <= remaining:
+            # the block ends with the copy that joins the templates
+            if n_templ == len(templates):
+                templates = np.concatenate([templates, np.zeros_like(templates)])
+            templates[n_templ] = copies[-1]
+            n_templ += 1
+        remaining -= g
+    seqs, counts = (count_sequences(np.concatenate(products)) if keep_sequences
+                    else (None, None))
+    return seqs, counts, pos_base, templates[:n_templ]
+
+if __name__ == "__main__":
+    seqs, counts, pos_base, templates = simulate_vectorised(seed=0)
+    # Report top sequences and site entropies
+    order = np.argsort(counts)[::-1][:10]
+    top = [(''.join(BASES[seqs[i]]), int(counts[i])) for i in order]
+    print("Top sequences:", top)
+    print("Site entropies (bits):", site_entropies(pos_base).tolist())
+
+    # Long run with longer polymers: 10^8 steps, L0 = 20.
+    seqs, counts, pos_base, templates = simulate_vectorised(10**8, L0=20, seed=1)
+    print(f"L0=20: {counts.sum()} products, {len(seqs)} distinct, {len(templates)} templates")
+    print("Site entropies (bits):", np.round(site_entropies(pos_base), 3))
\ No newline at end of file
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Pseudo-arclength continuation of equilibria and limit cycles.
+Works on F(x, p) -> dx/dt for one scalar parameter p; the adapters below wrap the
+RHS functions of the existing models (dict params, keyword params, module globals).
+Equilibria: fold (dp/ds changes sign), branch point / pitchfork (sign change of
+the augmented Jacobian determinant) and Hopf (complex pair crosses Re = 0).
+Limit cycles: shooting with a phase condition, started from a Hopf point;
+Floquet multipliers give stability.
+Requires: numpy, scipy
+"""
+import numpy as np
+from scipy.integrate import solve_ivp
+
+def dict_param(rhs, params, name):
+    # rhs(t, y, params) as in chemo.py / franksim.py
+    return lambda x, p: np.asarray(rhs(0.0, x, {**params, name: p}), dtype=float)
+
+def kwarg_param(rhs, params, name):
+    # rhs(t, y, **params) as in oregonatorcode.py
+    return lambda x, p: np.asarray(rhs(0.0, x, **{**params, name: p}), dtype=float)
+
+def global_param(module, rhs_name, names):
+    # rhs(t, y) reading module globals as in basin.py; names are set together for
+    # the call and restored afterwards
+    def F(x, p):
+        old = [getattr(module, n) for n in names]
+        try:
+            for n in names:
+                setattr(module, n, p)
+            return np.asarray(getattr(module, rhs_name)(0.0, x), dtype=float)
+        finally:
+            for n, v in zip(names, old):
+                setattr(module, n, v)
+    return F
+
+def approx_jacobian(f, x, rel_step=None):
+    # forward-difference Jacobian (m, n) of f: R^n -> R^m, steps rel_step * max(1, |x_i|)
+    x = np.asarray(x, dtype=float)
+    f0 = np.atleast_1d(np.asarray(f(x), dtype=float))
+    rel_step = np.sqrt(np.finfo(float).eps) if rel_step is None else rel_step
+    h = rel_step * np.where(x >= 0, 1.0, -1.0) * np.maximum(1.0, np.abs(x))
+    J = np.empty((f0.size, x.size))
+    for i in range(x.size):
+        xp = x.copy()
+        xp[i] += h[i]
+        J[:, i] = (np.atleast_1d(np.asarray(f(xp), dtype=float)) - f0) / (xp[i] - x[i])
+    return J
+
+def _jac(G, u, rel_step=None):
+    # finite-difference Jacobian, (n_eq, n_unknowns)
+    return approx_jacobian(G, u, rel_step=rel_step)
+
+def _tangent(A, prev=None):
+    # null vector of the n x (n+1) matrix A, oriented along prev
+    if prev is None:
+        t = np.linalg.svd(A)[2][-1]
+    else:
+        t = np.linalg.solve(np.vstack([A, prev]), np.append(np.zeros(len(A)), 1.0))
+    t /= np.linalg.norm(t)
+    if prev is not None and np.dot(t, prev) < 0:
+        t = -t
+    return t
+
+def _correct(G, u_pred, tangent, tol=1e-10, max_iter=10, rel_step=None):
+    # Newton on [G(u); tangent . (u - u_pred)] = 0
+    u = u_pred.copy()
+    for it in range(1, max_iter + 1):
+        r = np.append(G(u), np.dot(tangent, u - u_pred))
+        Ju = np.vstack([_jac(G, u, rel_step), tangent])
+        try:
+            du = np.linalg.solve(Ju, -r)
+        except np.linalg.LinAlgError:
+            return None, it
+        u += du
+        if np.linalg.norm(du) < tol * (1 + np.linalg.norm(u)):
+            return u, it
+    return None, max_iter
+
+def _bisect_arc(G, u0, t0, ds, test, f0, tol, iters=40):
+    # locate a zero of test(u, A, tangent) on the arc between s = 0 and s = ds
+    lo, hi = 0.0, ds
+    u = u0
+    for _ in range(iters):
+        mid = 0.5 * (lo + hi)
+        um, _ = _correct(G, u0 + mid * t0, t0, tol)
+        if um is None:
+            break
+        A = _jac(G, um)
+        fm = test(um, A, _tangent(A, t0))
+        u = um
+        if f0 * fm <= 0:
+            hi = mid
+        else:
+            lo, f0 = mid, fm
+    return u
+
+def continue_equilibria(F, x0, p0, p_range, ds=1e-2, ds_min=1e-6, ds_max=0.5,
+                        max_steps=2000, direction=1, scale=None, tol=1e-10):
+    """
+    Follow an equilibrium branch of F(x, p) = 0 from (x0, p0) until p leaves p_range.
+    x0 need only be close to an equilibrium at p0. scale: typical magnitudes
+    (len(x0) + 1) used to nondimensionalise the arclength; default |x0|, |p0|.
+    Returns dict with 'p', 'x', 'eigvals', 'stable' and 'bifurcations', a list of
+    {'type': 'fold' | 'branch' | 'hopf', 'p', 'x', 'index'} located by bisection
+    along the arc between the bracketing points.
+    """
+    x0 = np.asarray(x0, dtype=float)
+    n = len(x0)
+    if scale is None:
+        scale = np.append(np.abs(x0), abs(p0))
+        scale[scale == 0] = 1.0
+    scale = np.asarray(scale, dtype=float)
+    G = lambda u: F(u[:n] * scale[:n], u[n] * scale[n])
+    # converge the starting point at fixed p
+    x = x0 / scale[:n]
+    for _ in range(50):
+        r = G(np.append(x, p0 / scale[n]))
+        dx = np.linalg.solve(_jac(lambda z: G(np.append(z, p0 / scale[n])), x), -r)
+        x += dx
+        if np.linalg.norm(dx) < tol * (1 + np.linalg.norm(x)):
+            break
+    u = np.append(x, p0 / scale[n])
+    A = _jac(G, u)
+    tangent = _tangent(A)
+    if np.sign(tangent[n]) != np.sign(direction):
+        tangent = -tangent
+    iu, ju = np.triu_indices(n, 1)
+    eigvals = lambda A: np.linalg.eigvals(A[:, :n] / scale[:n])   # unscaled F_x
+    # test functions: fold (dp/ds), branch point (augmented determinant) and
+    # Hopf (product of pairwise eigenvalue sums; zero at lambda = +-i omega)
+    test_fns = {
+        'fold': lambda u, A, t: t[n],
+        'branch': lambda u, A, t: np.linalg.det(np.vstack([A, t])),
+        'hopf': lambda u, A, t: np.prod((lambda ev: ev[iu] + ev[ju])(eigvals(A))).real,
+    }
+    pts, eigs, tests, steps = [], [], [], []
+
+    def record(u, A, tangent):
+        pts.append((u.copy(), tangent.copy()))
+        eigs.append(eigvals(A))
+        tests.append({k: fn(u, A, tangent) for k, fn in test_fns.items()})
+
+    record(u, A, tangent)
+    for _ in range(max_steps):
+        u_new, iters = _correct(G, u + ds * tangent, tangent, tol)
+        if u_new is None:
+            ds *= 0.5
+            if ds < ds_min:
+                break
+            continue
+        A = _jac(G, u_new)
+        tangent = _tangent(A, tangent)
+        u = u_new
+        steps.append(ds)
+        record(u, A, tangent)
+        p = u[n] * scale[n]
+        if not (min(p_range) <= p <= max(p_range)):
+            break
+        ds = min(ds * (1.5 if iters <= 3 else 1.0), ds_max)
+    bif = []
+    for i in range(1, len(pts)):
+        for kind in test_fns:
+            a, b = tests[i - 1][kind], tests[i][kind]
+            if a * b >= 0:
+                continue
+            if kind == 'hopf':
+                # skip neutral saddles (real pair lambda, -lambda): the pair closest to
+                # summing to zero must be complex at a Hopf point
+                ev = eigs[i]
+                k = np.argmin(np.abs(ev[iu] + ev[ju]))
+                if abs(ev[iu[k]].imag) < 1e-8 * (1 + abs(ev[iu[k]])):
+                    continue
+            u0, t0 = pts[i - 1]
+            ub = _bisect_arc(G, u0, t0, steps[i - 1], test_fns[kind], a, tol) * scale
+            bif.append({'type': kind, 'index': i, 'p': ub[n], 'x': ub[:n]})
+    P = np.array([u for u, _ in pts]) * scale
+    stable = np.array([np.all(ev.real < 0) for ev in eigs])
+    return {'p': P[:, n], 'x': P[:, :n], 'eigvals': eigs, 'stable': stable,
+            'bifurcations': bif}
+
+def flow(F, x0, T, p, rtol=1e-9, atol=1e-12, method='LSODA'):
+    # state after time T
+    sol = solve_ivp(lambda t, y: F(y, p), (0.0, T), x0, method=method, rtol=rtol, atol=atol)
+    return sol.y[:, -1]
+
+# finite-difference step for derivatives of the flow map; must sit well above the
+# integration tolerance
+SHOOT_STEP = 1e-5
+
+def monodromy(F, x0, T, p, **kw):
+    # Jacobian of the period-T flow map; its eigenvalues are the Floquet multipliers
+    return approx_jacobian(lambda z: flow(F, z, T, p, **kw), np.asarray(x0, dtype=float),
+                           rel_step=SHOOT_STEP)
+
+def _cycle_residual(F, v, ref, fref, n, **kw):
+    # v = (x0, T, p): periodicity and phase condition (x0 - ref) . f(ref) = 0
+    x0, T, p = v[:n], v[n], v[n + 1]
+    return np.append(flow(F, x0, T, p, **kw) - x0, np.dot(x0 - ref, fref))
+
+def cycle_from_hopf(F, hopf, amplitude=1e-2, **kw):
+    """
+    First limit cycle near a Hopf point (dict from continue_equilibria): the orbit
+    guess x_H + amplitude * max(|x_H|, 1) * Re(v), T = 2 pi / omega, is corrected by Newton
+    with the amplitude held fixed and p free. Returns v = (x0, T, p).
+    """
+    xH, pH = np.asarray(hopf['x'], dtype=float), hopf['p']
+    n = len(xH)
+    J = approx_jacobian(lambda z: F(z, pH), xH)
+    ev, V = np.linalg.eig(J)
+    k = np.argmax(np.abs(ev.imag))
+    vr = V[:, k].real / np.linalg.norm(V[:, k].real)
+    vi = V[:, k].imag - np.dot(V[:, k].imag, vr) * vr
+    vi /= np.linalg.norm(vi)
+    size = amplitude * max(np.linalg.norm(xH), 1.0)
+    v = np.concatenate([xH + size * vr, [2 * np.pi / abs(ev[k].imag), pH]])
+    for _ in range(30):
+        # phase: x0 - x_H has no component along Im(v); amplitude along Re(v) fixed
+        G = lambda w: np.append(_cycle_residual(F, w, xH, vi, n, **kw),
+                                np.dot(w[:n] - xH, vr) - size)
+        dv = np.linalg.solve(approx_jacobian(G, v, rel_step=SHOOT_STEP), -G(v))
+        v += dv
+        if np.linalg.norm(dv) < 1e-9 * (1 + np.linalg.norm(v)):
+            break
+    return v
+
+def continue_cycles(F, v0, v1, p_range, max_steps=100, ds_max=None, **kw):
+    """
+    Pseudo-arclength continuation of periodic orbits by shooting from two nearby
+    solutions v0, v1 = (x0, T, p) (e.g. two cycle_from_hopf amplitudes).
+    Returns dict with 'p', 'T', 'x0', 'amplitude' (max - min of each component
+    along the orbit), 'multipliers', 'stable' and 'folds' (indices where dp/ds
+    changes sign).
+    """
+    v0, v1 = np.asarray(v0, dtype=float), np.asarray(v1, dtype=float)
+    n = len(v0) - 2
+    ds = np.linalg.norm(v1 - v0)
+    ds_max = 10 * ds if ds_max is None else ds_max
+    tangent = (v1 - v0) / ds
+    v = v1.copy()
+    out = []
+    for _ in range(max_steps):
+        ref, fref = v[:n].copy(), F(v[:n], v[n + 1])
+        G = lambda w: _cycle_residual(F, w, ref, fref, n, **kw)
+        v_new, iters = _correct(G, v + ds * tangent, tangent, tol=1e-9, max_iter=8,
+                                rel_step=SHOOT_STEP)
+        if v_new is None:
+            ds *= 0.5
+            if ds < 1e-8:
+                break
+            continue
+        tangent = (v_new - v) / np.linalg.norm(v_new - v)
+        v = v_new
+        sol = solve_ivp(lambda t, y: F(y, v[n + 1]), (0.0, v[n]), v[:n], method='LSODA',
+                        rtol=1e-9, atol=1e-12, dense_output=True)
+        orbit = sol.sol(np.linspace(0.0, v[n], 200))
+        mult = np.linalg.eigvals(monodromy(F, v[:n], v[n], v[n + 1], **kw))
+        out.append((v.copy(), orbit.max(axis=1) - orbit.min(axis=1), mult))
+        if not (min(p_range) <= v[n + 1] <= max(p_range)):
+            break
+        ds = min(ds * (1.5 if iters <= 3 else 1.0), ds_max)
+    V = np.array([o[0] for o in out])
+    mults = [o[2] for o in out]
+    # the trivial multiplier (closest to 1) is excluded from the stability test
+    stable = np.array([np.all(np.abs(np.delete(m, np.argmin(np.abs(m - 1)))) < 1)
+                       for m in mults])
+    dp = np.diff(V[:, n + 1])
+    folds = list(np.flatnonzero(dp[:-1] * dp[1:] < 0) + 1)
+    return {'p': V[:, n + 1], 'T': V[:, n], 'x0': V[:, :n],
+            'amplitude': np.array([o[1] for o in out]), 'multipliers': mults,
+            'stable': stable, 'folds': folds}
+
+if __name__ == "__main__":
+    # basin.py toggle switch: symmetric branch in alpha = alpha_u = alpha_v
+    import basin
+    F = global_param(basin, 'toggle_rhs', ('alpha_u', 'alpha_v'))
+    branch = continue_equilibria(F, [0.5, 0.5], 0.5, (0.5, 10.0), ds=0.05)
+    for b in branch['bifurcations']:
+        print(b['type'], "at alpha = {:.4f}".format(b['p']), b['x'])
+    # oregonatorcode.py: Hopf points in f, then the cycle branch from the first one.
+    # (oregonatorcode.py must be on the import path; Hopf points at f ~ 0.569 and 1.271)
+    # from oregonatorcode import oregonator, steady_state
+    # F = kwarg_param(oregonator, dict(q=0.002, f=1.4, phi=0.08), 'f')
+    # x_ss = steady_state(q=0.002, f=0.3, phi=0.08)
+    # eq = continue_equilibria(F, x_ss, 0.3, (0.3, 3.0))
+    # hopf = [b for b in eq['bifurcations'] if b['type'] == 'hopf'][0]
+    # cycles = continue_cycles(F, cycle_from_hopf(F, hopf, 1e-2),
+    #                          cycle_from_hopf(F, hopf, 2e-2), (0.3, 3.0))
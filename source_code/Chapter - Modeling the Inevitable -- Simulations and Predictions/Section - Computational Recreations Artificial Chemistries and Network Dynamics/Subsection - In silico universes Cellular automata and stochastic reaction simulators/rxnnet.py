@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Declarative mass-action reaction networks.
+A network is a species list plus reactions written as ('2 F -> G', k).
+compile_network() turns it into a vectorised NumPy RHS and a sparse analytic
+Jacobian suitable for solve_ivp(..., jac=net['jac']) with BDF/Radau/LSODA.
+solve() picks an integrator from the Jacobian spectrum at the initial state;
+steady_state() finds fixed points directly instead of integrating to t=inf.
+Requires: numpy, scipy
+"""
+import re
+import warnings
+import numpy as np
+import scipy.sparse as sp
+from scipy.integrate import solve_ivp
+from scipy.optimize import newton_krylov
+from scipy.sparse.linalg import eigs, lsqr, spsolve
+
+def parse_side(side):
+    # '2 F + G' -> {'F': 2, 'G': 1}; '' or '0' -> {}
+    # terms are separated by ' + ' so ionic names like 'H3+' survive
+    terms = {}
+    side = side.strip()
+    if side in ('', '0'):
+        return terms
+    for term in side.split(' + '):
+        m = re.fullmatch(r'\s*(\d+(?:\.\d+)?)?\s*(\S+)\s*', term)
+        if m is None:
+            raise ValueError(f"cannot parse term {term!r}")
+        coef = float(m.group(1)) if m.group(1) else 1.0
+        terms[m.group(2)] = terms.get(m.group(2), 0.0) + coef
+    return terms
+
+def parse_reaction(rxn):
+    """
+    Normalise a reaction to a dict with 'reactants', 'products', 'k', 'change'.
+    rxn: ('A + B -> 2 C', k), ('A + B -> 2 C', k, change) or a dict with keys
+    'reactants', 'products', 'k' and optional 'change'.
+    Reactants set the mass-action rate law k * prod y_s^nu_s. 'change' overrides the
+    net stoichiometry (products - reactants), e.g. for catalysts, reservoirs or
+    deliberately simplified bookkeeping in the original models.
+    """
+    if isinstance(rxn, dict):
+        out = {'reactants': dict(rxn.get('reactants', {})),
+               'products': dict(rxn.get('products', {})), 'k': float(rxn['k'])}
+        change = rxn.get('change')
+    else:
+        eq, k = rxn[0], rxn[1]
+        change = rxn[2] if len(rxn) > 2 else None
+        lhs, rhs = eq.split('->')
+        out = {'reactants': parse_side(lhs), 'products': parse_side(rhs), 'k': float(k)}
+    if change is None:
+        change = dict(out['products'])
+        for s, nu in out['reactants'].items():
+            change[s] = change.get(s, 0.0) - nu
+    out['change'] = change
+    return out
+
+def compile_network(species, reactions):
+    """
+    Build vectorised RHS and sparse Jacobian for a mass-action network.
+    species: list of names (state order); reactions: list accepted by parse_reaction.
+    Returns dict with 'rhs(t, y)', 'jac(t, y)' (CSC), 'rates(y)', 'jac_sparsity',
+    'S' (species x reactions stoichiometry, CSR), 'k' (rate constants; edit in
+    place to change parameters), 'species', 'index', 'reactions'.
+    """
+    index = {s: i for i, s in enumerate(species)}
+    rxns = [parse_reaction(r) for r in reactions]
+    n_sp, n_rx = len(species), len(rxns)
+    k = np.array([r['k'] for r in rxns], dtype=float)
+    # reactant slots padded to the widest rate law; padding points at a constant 1
+    width = max([len(r['reactants']) for r in rxns] + [1])
+    idx = np.full((n_rx, width), n_sp, dtype=np.int64)
+    order = np.zeros((n_rx, width))
+    for j, r in enumerate(rxns):
+        for slot, (s, nu) in enumerate(r['reactants'].items()):
+            idx[j, slot], order[j, slot] = index[s], nu
+    rows, cols, vals = [], [], []
+    for j, r in enumerate(rxns):
+        for s, nu in r['change'].items():
+            if nu != 0:
+                rows.append(index[s]); cols.append(j); vals.append(nu)
+    S = sp.csr_matrix((vals, (rows, cols)), shape=(n_sp, n_rx))
+
+    def terms(y):
+        yext = np.append(np.asarray(y, dtype=float), 1.0)
+        return yext[idx], yext[idx] ** order
+
+    def rates(y):
+        return k * np.prod(terms(y)[1], axis=1)
+
+    def rhs(t, y):
+        return S @ rates(y)
+
+    # J = S @ D with D[r, s] = d rate_r / d y_s. D has a fixed pattern (one entry per
+    # reactant slot), so J.data = M @ D.data with M precomputed once.
+    d_r, d_slot = np.nonzero(order)
+    d_s = idx[d_r, d_slot]
+    Sc = S.tocsc()
+    ji, js, coef, ent = [], [], [], []
+    for e, (r, s) in enumerate(zip(d_r, d_s)):
+        lo, hi = Sc.indptr[r], Sc.indptr[r + 1]
+        for i, nu in zip(Sc.indices[lo:hi], Sc.data[lo:hi]):
+            ji.append(i); js.append(s); coef.append(nu); ent.append(e)
+    ji, js = np.array(ji, dtype=np.int64), np.array(js, dtype=np.int64)
+    key, inv = np.unique(js * n_sp + ji, return_inverse=True)   # column-major = CSC order
+    M = sp.csr_matrix((coef, (inv, ent)), shape=(len(key), len(d_r)))
+    J_rows, J_cols = key % n_sp, key // n_sp
+    pattern = sp.csc_matrix((np.ones(len(key)), (J_rows, J_cols)), shape=(n_sp, n_sp))
+    J_indices, J_indptr = pattern.indices, pattern.indptr
+
+    def jac(t, y):
+        base, powered = terms(y)
+        d_vals = np.empty(len(d_r))
+        for slot in range(width):
+            sel = d_slot == slot
+            r = d_r[sel]
+            others = np.prod(np.delete(powered[r], slot, axis=1), axis=1)
+            nu = order[r, slot]
+            d_vals[sel] = k[r] * nu * base[r, slot] ** (nu - 1) * others
+        return sp.csc_matrix((M @ d_vals, J_indices, J_indptr), shape=(n_sp, n_sp))
+
+    return {'rhs': rhs, 'jac': jac, 'rates': rates, 'jac_sparsity': pattern,
+            'S': S, 'k': k, 'species': list(species), 'index': index, 'reactions': rxns}
+
+def approx_jacobian(f, x, rel_step=None, central=False):
+    """
+    Finite-difference Jacobian (m, n) of f: R^n -> R^m at x. Steps are
+    rel_step * max(1, |x_i|), default sqrt(eps) forward or eps^(1/3) central.
+    """
+    x = np.asarray(x, dtype=float)
+    g = lambda z: np.atleast_1d(np.asarray(f(z), dtype=float))
+    eps = np.finfo(float).eps
+    if rel_step is None:
+        rel_step = eps ** (1 / 3) if central else eps ** 0.5
+    h = rel_step * np.where(x >= 0, 1.0, -1.0) * np.maximum(1.0, np.abs(x))
+    f0 = None if central else g(x)
+    cols = []
+    for i in range(x.size):
+        xp = x.copy()
+        xp[i] += h[i]
+        if central:
+            xm = x.copy()
+            xm[i] -= h[i]
+            cols.append((g(xp) - g(xm)) / (xp[i] - xm[i]))
+        else:
+            cols.append((g(xp) - f0) / (xp[i] - x[i]))
+    return np.column_stack(cols) if cols else np.zeros((g(x).size, 0))
+
+def jacobian_spectrum(fun, t0, y0, jac=None, dense_below=400):
+    """
+    Eigenvalues of the Jacobian at (t0, y0): all of them for small systems, else the
+    few of largest magnitude from ARPACK. Uses finite differences if jac is None.
+    """
+    y0 = np.asarray(y0, dtype=float)
+    J = jac(t0, y0) if callable(jac) else jac
+    if J is None:
+        J = approx_jacobian(lambda y: fun(t0, y), y0)
+    if len(y0) <= dense_below:
+        J = J.toarray() if sp.issparse(J) else np.asarray(J)
+        return np.linalg.eigvals(J)
+    return eigs(sp.csc_matrix(J), k=6, which='LM', return_eigenvectors=False)
+
+def choose_method(eigvals, t_span, rtol=1e-3, n=None):
+    """
+    Stiffness index S = max(-Re lambda) * (t1 - t0), i.e. how many of the fastest
+    decay times fit in the span. Explicit RK45 for S < 1e2, LSODA (auto-switching)
+    up to 1e4, then Radau for oscillatory or tight-tolerance small systems and BDF
+    otherwise. Returns (method, S).
+    """
+    span = abs(t_span[1] - t_span[0])
+    decay = np.max(-eigvals.real, initial=0.0)
+    S = decay * span
+    if S < 1e2:
+        return ('DOP853' if rtol < 1e-8 else 'RK45'), S
+    if S < 1e4:
+        return 'LSODA', S
+    stiff = eigvals[-eigvals.real > 1e-3 * decay]
+    oscillatory = np.any(np.abs(stiff.imag) > np.abs(stiff.real))
+    if oscillatory or (rtol < 1e-8 and (n or len(eigvals)) <= 50):
+        return 'Radau', S
+    return 'BDF', S
+
+def print_stats(info):
+    # default instrumentation hook
+    print("{method}: stiffness={stiffness:.2e} nfev={nfev} njev={njev} nlu={nlu} "
+          "steps={n_steps} status={status}".format(**info))
+
+def solve(fun, t_span, y0, jac=None, method='auto', hook=None, **kwargs):
+    """
+    solve_ivp with automatic solver choice and instrumentation.
+    method='auto' estimates stiffness from the Jacobian spectrum at y0 (see
+    choose_method); any solve_ivp method name is passed through unchanged.
+    jac may return sparse matrices; they are densified for LSODA and dropped for
+    explicit methods. hook(info) receives a dict with method, stiffness, the
+    eigenvalue extremes, nfev, njev, nlu and n_steps; the same dict is attached
+    to the result as sol.diagnostics.
+    """
+    y0 = np.asarray(y0, dtype=float)
+    rtol = kwargs.get('rtol', 1e-3)
+    ev = jacobian_spectrum(fun, t_span[0], y0, jac)
+    stiffness = float(np.max(-ev.real, initial=0.0) * abs(t_span[1] - t_span[0]))
+    if method == 'auto':
+        method, stiffness = choose_method(ev, t_span, rtol, len(y0))
+    if method in ('RK23', 'RK45', 'DOP853'):
+        jac = None
+    elif method == 'LSODA' and callable(jac):
+        sparse_jac = jac
+        jac = lambda t, y: (lambda J: J.toarray() if sp.issparse(J) else J)(sparse_jac(t, y))
+    # dense output gives the accepted-step grid even when t_eval is requested
+    want_dense = kwargs.pop('dense_output', False)
+    if jac is not None:
+        kwargs['jac'] = jac
+    sol = solve_ivp(fun, t_span, y0, method=method, dense_output=True, **kwargs)
+    n_steps = len(sol.sol.ts) - 1 if sol.sol is not None else len(sol.t) - 1
+    if not want_dense:
+        sol.sol = None
+    info = {'method': method, 'stiffness': stiffness,
+            'max_decay_rate': float(np.max(-ev.real, initial=0.0)),
+            'max_imag': float(np.max(np.abs(ev.imag), initial=0.0)),
+            'nfev': sol.nfev, 'njev': sol.njev, 'nlu': sol.nlu,
+            'n_steps': n_steps, 'status': sol.status}
+    sol.diagnostics = info
+    if hook is not None:
+        hook(info)
+    return sol
+
+def _jacobian(fun, t, y, jac):
+    if jac is not None:
+        return jac(t, y) if callable(jac) else jac
+    return approx_jacobian(lambda z: fun(t, z), y)
+
+def _solve_linear(A, b):
+    if sp.issparse(A):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', sp.linalg.MatrixRankWarning)
+            x = spsolve(sp.csc_matrix(A), b)
+    else:
+        x = np.linalg.solve(A, b)
+    if not np.all(np.isfinite(x)):
+        raise np.linalg.LinAlgError("singular Jacobian")
+    return x
+
+def _newton_size(J, f, y, atol):
+    # relative size of the minimum-norm Newton step; well defined when conservation
+    # laws make J singular
+    dx = lsqr(J, -f)[0] if sp.issparse(J) else np.linalg.lstsq(J, -f, rcond=None)[0]
+    return np.max(np.abs(dx) / (np.abs(y) + atol))
+
+def steady_state(fun, y0, jac=None, t=0.0, tol=1e-10, atol=None, max_newton=50,
+                 max_ptc=2000, dt0=None, nonneg=True, dense_below=400):
+    """
+    Fixed point of dy/dt = fun(t, y) near y0.
+    1. Damped Newton with the (analytic, else finite-difference) Jacobian; for
+       large systems without a Jacobian, scipy's Newton-Krylov.
+    2. If Newton fails, hits a singular Jacobian (conservation laws) or leaves the
+       nonnegative orthant, pseudo-transient continuation from y0:
+       (I/dt - J) dx = f with dt grown by switched evolution relaxation.
+       Each step conserves the linear invariants of the network. Where fixed
+       points form a continuum not pinned by linear invariants (e.g. a product
+       that only accumulates), the point reached depends on the dt schedule.
+    Convergence: the relative Newton step max|dx|/(|y|+atol) falls below tol;
+    atol defaults to 1e-12 * max|y0|.
+    Stability: eigenvalues of J at the fixed point; eigenvalues with
+    |lambda| <= 1e-9 * max|lambda| (conservation laws) are ignored.
+    Returns dict with 'y', 'converged', 'method', 'iterations', 'eigvals', 'stable'.
+    """
+    y0 = np.asarray(y0, dtype=float)
+    if atol is None:
+        atol = 1e-12 * max(np.max(np.abs(y0)), 1e-300)
+    F = lambda y: np.asarray(fun(t, y), dtype=float)
+    result = None
+    # 1. Newton
+    y = y0.copy()
+    try:
+        if jac is None and len(y0) > dense_below:
+            y = newton_krylov(F, y0, f_tol=tol * max(np.max(np.abs(F(y0))), 1e-300))
+            result = (y, 'newton-krylov', 0)
+        else:
+            for it in range(1, max_newton + 1):
+                f = F(y)
+                dx = _solve_linear(_jacobian(fun, t, y, jac), -f)
+                lam, norm0 = 1.0, np.linalg.norm(f)
+                while lam > 1e-4:
+                    trial = y + lam * dx
+                    if (not nonneg or trial.min() >= 0) and np.linalg.norm(F(trial)) <= (1 - 1e-4 * lam) * norm0:
+                        break
+                    lam *= 0.5
+                y = y + lam * dx
+                if np.max(np.abs(lam * dx) / (np.abs(y) + atol)) < tol:
+                    result = (y, 'newton', it)
+                    break
+    except (np.linalg.LinAlgError, ValueError, ArithmeticError, RuntimeError):
+        result = None
+    if result is not None and nonneg and result[0].min() < -atol:
+        result = None
+    # 2. pseudo-transient continuation
+    if result is None:
+        y = y0.copy()
+        J = _jacobian(fun, t, y, jac)
+        f = F(y)
+        if dt0 is None:
+            Jd = J.toarray() if sp.issparse(J) else np.asarray(J)
+            dt0 = 1e-3 / max(np.max(np.abs(Jd).sum(axis=1)), 1e-300)
+        dt = dt0
+        for it in range(1, max_ptc + 1):
+            I = sp.identity(len(y), format='csc') if sp.issparse(J) else np.eye(len(y))
+            dx = _solve_linear(I / dt - J, f)
+            y = y + dx
+            if nonneg:
+                y = np.maximum(y, 0.0)
+            f_new = F(y)
+            # SER growth (at least 20% per step), capped so I/dt stays above round-off of J
+            dt = min(dt * max(np.linalg.norm(f) / max(np.linalg.norm(f_new), 1e-300), 1.2), 1e15 * dt0)
+            f = f_new
+            J = _jacobian(fun, t, y, jac)
+            if np.max(np.abs(dx) / (np.abs(y) + atol)) < tol and _newton_size(J, f, y, atol) < tol:
+                result = (y, 'ptc', it)
+                break
+    converged = result is not None
+    y, method, iters = result if converged else (y, 'ptc', max_ptc)
+    J = _jacobian(fun, t, y, jac)
+    ev = jacobian_spectrum(fun, t, y, J)
+    scale = np.max(np.abs(ev), initial=0.0)
+    active = ev[np.abs(ev) > 1e-9 * scale]
+    return {'y': y, 'converged': converged, 'method': method, 'iterations': iters,
+            'eigvals': ev, 'stable': bool(np.all(active.real < 0))}
+
+# Existing kinetics modules written in this format. Constant reservoirs
+# (n_H2, n_CO, nHe, A0, ...) are folded into the rate constants.
+
+def formose_network(k0=1e-2, kcat=1.0, ks=1e-1, kc=1e-3, kd=1e-2):
+    # formoseode.py
+    return compile_network(['F', 'G', 'S'], [
+        ('2 F -> G', k0),
+        ('G + F -> 2 G', kcat),
+        ('G + F -> S', ks),
+        ('2 F -> 0', kc),
+        ('G -> 0', kd),
+    ])
+
+def strecker_network(k1=1.0, km1=1e-1, k2=1e3, k3=1e-4):
+    # strekkinetics.py
+    return compile_network(['RCHO', 'NH3', 'CN', 'I', 'N', 'AA'], [
+        ('RCHO + NH3 -> I', k1),
+        ('I -> RCHO + NH3', km1),
+        ('I + CN -> N', k2),
+        ('N -> AA + NH3', k3),
+    ])
+
+def oxaloacetate_network(k_forward=1.0, metal_factor=10.0, k_dec=1e-3):
+    # oxalokine.py
+    return compile_network(['P', 'G', 'O'], [
+        ('P + G -> O', k_forward * metal_factor),
+        ('O -> P', k_dec),
+    ])
+
+def thioester_network(k_form=1e2, k_hyd=1e-3, k_transfer=1e1, A0=1e-3):
+    # thioesterkinetics.py; transfer rate k*AcS*(A0 - Ac) is split into two terms
+    return compile_network(['Ac', 'T', 'AcS'], [
+        ('Ac + T -> AcS', k_form),
+        ('AcS -> Ac + T', k_hyd),
+        ('AcS -> Ac + T', k_transfer * A0),
+        ('AcS + Ac -> 0', k_transfer, {'Ac': -1, 'T': -1, 'AcS': +1}),
+    ])
+
+def radical_network(k_i=1e-6, k_p=1e6, k_t=1e8, k_pcet=1e3):
+    # radicalkinetics.py; termination written as in the source (dR = -k_t R^2)
+    return compile_network(['R', 'M', 'D'], [
+        ('0 -> R', k_i),
+        ('2 R -> 0', k_t, {'R': -1}),
+        ('R + D -> 0', k_pcet),
+        ('R + M -> 0', k_p),
+    ])
+
+def ionnet_network(T=10.0, n_H2=1e4, zeta=1.0e-17):
+    # ionnet.py
+    n_CO = 1e-5 * n_H2
+    return compile_network(['H3+', 'HCO+', 'e-'], [
+        ('0 -> H3+ + e-', zeta * n_H2),
+        ('H3+ -> HCO+', 1.7e-9 * n_CO),
+        ('HCO+ + e- -> 0', 2.0e-7 * (T/300.0)**(-0.5)),
+        ('H3+ + e- -> 0', 6.0e-8 * (T/300.0)**(-0.5)),
+    ])
+
+def heh_network(nHe=8.0, k_ra=1e-16, k_cx=1e-9, alpha_dr=1e-7, k1=1e-9):
+    # hehnetwork.py, including its approximate H/H+/e- bookkeeping
+    return compile_network(['H', 'H+', 'H2+', 'HeH+', 'e-'], [
+        ('H+ -> HeH+', k_ra * nHe),
+        ('HeH+ + H -> H2+', k_cx, {'HeH+': -1, 'H2+': +1, 'H': -1}),
+        ('HeH+ + e- -> 0', alpha_dr, {'HeH+': -1, 'e-': -1}),
+        ('H2+ + H -> H+', k1, {'H2+': -1, 'H+': +1, 'H': -1}),
+    ])
+
+if __name__ == "__main__":
+    # hehnetwork.py over 1e13 s with the exact sparse Jacobian
+    nH_tot = 1e2
+    net = heh_network(nHe=0.08 * nH_tot)
+    y0 = [0.99 * nH_tot, 1e-2 * nH_tot, 0.0, 0.0, 1e-2 * nH_tot]
+    sol = solve_ivp(net['rhs'], (0.0, 1e13), y0, method='BDF', jac=net['jac'],
+                    rtol=1e-6, atol=1e-12)
+    print("HeH+ fraction of He:", sol.y[3, -1] / (0.08 * nH_tot), "nfev:", sol.nfev)
+    # ionnet.py to ~1 Myr: the spectrum check selects an implicit method
+    net = ionnet_network()
+    sol = solve(net['rhs'], (0.0, 3.154e13), [1e-12, 1e-12, 1e-12], jac=net['jac'],
+                rtol=1e-8, atol=1e-12, hook=print_stats)
+    print("Final abundances (cm^-3):", sol.y[:, -1])
+    ss = steady_state(net['rhs'], [1e-12, 1e-12, 1e-12], jac=net['jac'])
+    print("Steady state:", ss['y'], ss['method'], "stable:", ss['stable'])
+    # thioesterkinetics.py: conservation laws make J singular -> PTC fallback
+    net = thioester_network()
+    ss = steady_state(net['rhs'], [1e-3, 1e-4, 0.0], jac=net['jac'])
+    print("steady-state acetyl-thioester:", ss['y'][2], ss['method'], ss['iterations'])
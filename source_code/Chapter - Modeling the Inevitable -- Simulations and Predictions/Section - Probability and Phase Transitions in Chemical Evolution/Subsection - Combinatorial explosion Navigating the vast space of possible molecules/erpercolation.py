@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 # Estimate sequence counts and compute largest-component fraction vs p.
 import math
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+from scipy.stats import binom
 
 def sequence_space_size(a:int, L:int) -> float:
     # return a**L, careful with large L -> use log for safety
@@ -17,6 +19,96 @@ def er_largest_component_fraction(n:int, p:float, seed=None) -> float:
     largest = max((len(c) for c in nx.connected_components(G)), default=0)
     return largest / n
 
+def _distinct_edges(n:int, m_max:int, rng, batch:int=1 << 16):
+    # m_max distinct undirected edges in uniformly random order, yielded in batches
+    # of (u, v). Dense requests permute all pairs; sparse ones reject repeats.
+    M = n * (n - 1) // 2
+    if 2 * m_max >= M:
+        iu, iv = np.triu_indices(n, 1)
+        order = rng.permutation(M)[:m_max]
+        for s in range(0, m_max, batch):
+            yield iu[order[s:s + batch]], iv[order[s:s + batch]]
+        return
+    seen = set()
+    left = m_max
+    while left > 0:
+        k = min(batch, left)
+        u = rng.integers(0, n, size=2 * k)
+        v = (u + rng.integers(1, n, size=2 * k)) % n   # no self-loops
+        key = np.minimum(u, v) * n + np.maximum(u, v)
+        key, first = np.unique(key, return_index=True)
+        key = key[np.argsort(first)]                    # keep the draw order
+        fresh = [x for x in key.tolist() if x not in seen][:k]
+        seen.update(fresh)
+        fresh = np.array(fresh, dtype=np.int64)
+        left -= len(fresh)
+        yield fresh // n, fresh % n
+
+def newman_ziff_er(n:int, m_max:int, seed=None, truncate:bool=False) -> np.ndarray:
+    # add up to m_max random distinct edges one at a time; return largest component
+    # size after each m (Newman-Ziff: union-find with path halving and union by size).
+    # Once the graph is connected the rest is n; truncate=True returns early instead.
+    rng = np.random.default_rng(seed)
+    parent = list(range(n))
+    size = [1] * n
+    largest = [1 if n > 0 else 0]
+    big = largest[0]
+    for u, v in _distinct_edges(n, m_max, rng):
+        for a, b in zip(u.tolist(), v.tolist()):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a != b:
+                if size[a] < size[b]:
+                    a, b = b, a
+                parent[b] = a
+                size[a] += size[b]
+                if size[a] > big:
+                    big = size[a]
+            largest.append(big)
+            if big == n:
+                break
+        if big == n:
+            break
+    largest = np.array(largest, dtype=np.int64)
+    if truncate or len(largest) == m_max + 1:
+        return largest
+    return np.concatenate([largest, np.full(m_max + 1 - len(largest), n, dtype=np.int64)])
+
+def er_giant_curve(n:int, ps, n_reps:int=1, seed=None, workers=None) -> np.ndarray:
+    # S(p) over an arbitrary p grid from one edge sequence per replica.
+    # Microcanonical S_m is averaged over replicas (in parallel), then convolved
+    # with Binomial(M, p) to give the canonical G(n, p) ensemble.
+    ps = np.asarray(ps, dtype=float)
+    if n == 0:
+        return np.zeros_like(ps)
+    M = n * (n - 1) // 2
+    mean = ps.max() * M
+    m_max = int(min(M, math.ceil(mean + 8 * math.sqrt(mean) + 1)))
+    seeds = np.random.SeedSequence(seed).spawn(n_reps)
+    if n_reps == 1 or workers == 1:
+        runs = [newman_ziff_er(n, m_max, s, truncate=True) for s in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            runs = list(ex.map(newman_ziff_er, [n] * n_reps, [m_max] * n_reps, seeds,
+                               [True] * n_reps))
+    # runs stop once connected; past their end S_m = 1
+    L = max(len(r) for r in runs)
+    S_m = np.mean([np.pad(r, (0, L - len(r)), constant_values=n) for r in runs], axis=0) / n
+    S = np.zeros_like(ps)
+    for i, p in enumerate(ps):
+        # binomial weights only within +-8 sd of the mean edge count
+        sd = math.sqrt(M * p * (1 - p))
+        lo = max(0, int(p * M - 8 * sd))
+        hi = min(m_max, int(math.ceil(p * M + 8 * sd)) + 1)
+        w = binom.pmf(np.arange(lo, hi + 1), M, p)
+        S_w = S_m[np.minimum(np.arange(lo, hi + 1), L - 1)]
+        S[i] = np.dot(w, S_w) / w.sum() if w.sum() > 0 else S_m[min(hi, L - 1)]
+    return S
+
 if __name__ == "__main__":
     # Parameters
     alphabet = 20           # amino acids
@@ -29,9 +121,13 @@ if __name__ == "__main__":
         print(f"L={L}, sequences ~ {S:.3e}")
 
     fractions = [er_largest_component_fraction(n_nodes, p, seed=42) for p in ps]
+    # fine-grid curve from one edge sequence per replica
+    ps_fine = np.logspace(-6, -2, 400)
+    S_fine = er_giant_curve(n_nodes, ps_fine, n_reps=4, seed=42)
 
     # Plot (optional visualization)
-    plt.semilogx(ps, fractions, marker='o')
+    plt.semilogx(ps, fractions, marker='o', linestyle='none', label='per-p graphs')
+    plt.semilogx(ps_fine, S_fine, label='Newman-Ziff')
     plt.axvline(1/(n_nodes-1), color='red', linestyle='--', label='theoretical p_c')
     plt.xlabel('edge probability p')
     plt.ylabel('largest component fraction')
@@ -14,18 +14,23 @@ V0 = 4.18879   # initial volume of sphere (um^3) ~ (4/3)pi R^3 with R=1
 
 s_threshold = 4.0  # surface-to-volume threshold for division (um^-1)
 
-def odes(t, y):
+# defaults passed to odes; simulate(..., params={...}) overrides individual entries
+PARAMS = dict(r=r, K=K, delta=delta, k_upt=k_upt, L_ext=L_ext, beta=beta, mu=mu, A_eq=A_eq)
+
+def odes(t, y, p=PARAMS):
     N, A = y
-    dNdt = r * N / (1 + N / K) - delta * N
-    dAdt = k_upt * L_ext * A + beta * N - mu * (A - A_eq)
+    dNdt = p['r'] * N / (1 + N / p['K']) - p['delta'] * N
+    dAdt = p['k_upt'] * p['L_ext'] * A + p['beta'] * N - p['mu'] * (A - p['A_eq'])
     return [dNdt, dAdt]
 
-def simulate(tmax=500.0, dt=0.1):
+def simulate(tmax=500.0, dt=0.1, y0=None, params=None, seed=None):
+    p = {**PARAMS, **(params or {})}
+    rng = np.random.default_rng(seed)
     t = 0.0
-    state = np.array([10.0, A_eq])  # initial N, A
+    state = np.array([10.0, p['A_eq']] if y0 is None else y0, dtype=float)  # initial N, A
     times, Ns, As = [t], [state[0]], [state[1]]
     while t < tmax:
-        sol = solve_ivp(odes, [t, t+dt], state, method='RK45', rtol=1e-6)
+        sol = solve_ivp(odes, [t, t+dt], state, method='RK45', rtol=1e-6, args=(p,))
         state = sol.y[:, -1]
         # compute current volume from area assuming sphere: A = 4*pi*R^2 => R = sqrt(A/(4*pi))
         R = np.sqrt(state[1] / (4*np.pi))
@@ -34,16 +39,99 @@ def simulate(tmax=500.0, dt=0.1):
         # division event
         if s > s_threshold and state[0] >= 2:
             # stochastic partitioning of replicators (binomial)
-            n_left = np.random.binomial(int(round(state[0])), 0.5)
+            n_left = rng.binomial(int(round(state[0])), 0.5)
             n_right = int(round(state[0])) - n_left
             # split into two daughters; continue simulation with one daughter chosen at random
-            state = np.array([n_left, state[1]/2.0]) if np.random.rand() < 0.5 else np.array([n_right, state[1]/2.0])
+            state = np.array([n_left, state[1]/2.0]) if rng.random() < 0.5 else np.array([n_right, state[1]/2.0])
         t += dt
         times.append(t); Ns.append(state[0]); As.append(state[1])
     return np.array(times), np.array(Ns), np.array(As)
 
+def surface_to_volume(A):
+    # sphere of area A: R = sqrt(A/(4*pi)), V = 4/3*pi*R^3
+    R = np.sqrt(A / (4*np.pi))
+    return A / (4/3 * np.pi * R**3)
+
+def division_event(t, y, p=PARAMS):
+    # crosses zero upward when s > s_threshold and N >= 2 both hold
+    return min(surface_to_volume(y[1]) - s_threshold, y[0] - 2)
+division_event.terminal = True
+division_event.direction = 1
+
+def simulate_events(tmax=500.0, dt=0.1, t_eval=None, seed=None, y0=None, params=None):
+    # Same model as simulate() with one continuous integration per inter-division
+    # interval instead of one per dt. A division fires at the exact threshold
+    # crossing rather than at the next dt step. While the condition still holds
+    # (halving A raises s, so it does whenever N >= 2) the vesicle divides again
+    # after each further dt, as simulate() does. Output is written on t_eval
+    # (default: legacy dt grid) into preallocated arrays; a record at a division
+    # time shows the state after it. Returns times, Ns, As, division_times.
+    p = {**PARAMS, **(params or {})}
+    rng = np.random.default_rng(seed)
+    if t_eval is None:
+        t_eval = np.arange(0.0, tmax + dt/2, dt)
+    Ns = np.full(len(t_eval), np.nan)
+    As = np.full(len(t_eval), np.nan)
+    division_times = []
+    t = 0.0
+    state = np.array([10.0, p['A_eq']] if y0 is None else y0, dtype=float)  # initial N, A
+    i = 0
+
+    def divide(state):
+        # stochastic partitioning of replicators; follow one daughter at random
+        n_left = rng.binomial(int(round(state[0])), 0.5)
+        n_keep = n_left if rng.random() < 0.5 else int(round(state[0])) - n_left
+        division_times.append(t)
+        return np.array([float(n_keep), state[1]/2.0])
+
+    while t < tmax:
+        if surface_to_volume(state[1]) > s_threshold and state[0] >= 2:
+            # condition already holds: integrate one dt, then divide if it still does
+            t1 = min(t + dt, tmax)
+            n = np.searchsorted(t_eval, t1, side='right') - i
+            sol = solve_ivp(odes, [t, t1], state, method='RK45', rtol=1e-6, args=(p,),
+                            t_eval=np.append(t_eval[i:i+n], t1))
+            Ns[i:i+n], As[i:i+n] = sol.y[:, :n]
+            i += n
+            t, state = t1, sol.y[:, -1]
+            if surface_to_volume(state[1]) > s_threshold and state[0] >= 2:
+                state = divide(state)
+            continue
+        sol = solve_ivp(odes, [t, tmax], state, method='RK45', rtol=1e-6, args=(p,),
+                        t_eval=t_eval[i:], events=division_event)
+        n = len(sol.t)
+        if n:  # an event can fire before the next output time
+            Ns[i:i+n], As[i:i+n] = sol.y
+        i += n
+        if sol.status != 1:
+            break
+        t = sol.t_events[0][0]
+        # the located crossing may sit a rounding error short of the threshold,
+        # so the event itself triggers the division
+        state = divide(sol.y_events[0][0])
+    return t_eval, Ns, As, np.array(division_times)
+
 # Example run (plotting omitted for brevity)
 if __name__ == "__main__":
     times, Ns, As = simulate()
     # save results for experimental comparison
-    np.savez("vesicle_sim_results.npz", t=times, N=Ns, A=As)
\ No newline at end of file
+    np.savez("vesicle_sim_results.npz", t=times, N=Ns, A=As)
+
+    # The defaults never divide (A only grows from A_eq, so s = 3/R only falls).
+    # Check against the fixed-step loop with an area that relaxes from 10 um^2
+    # towards ~2 um^2 (no replicator-driven growth), crossing s = 4 um^-1 near t = 9.4.
+    params = dict(beta=0.0, mu=0.05, A_eq=2.0)
+    y0, tmax, n_runs = [10.0, 10.0], 100.0, 200
+    first_leg, count_leg, first_ev, count_ev = [], [], [], []
+    for k in range(n_runs):
+        t_leg, _, A_leg = simulate(tmax, y0=y0, params=params, seed=k)
+        div = t_leg[1:][A_leg[1:] < 0.75 * A_leg[:-1]]     # steps where A halved
+        first_leg.append(div[0])
+        count_leg.append(len(div))
+        div = simulate_events(tmax, seed=k, y0=y0, params=params)[3]
+        first_ev.append(div[0])
+        count_ev.append(len(div))
+    print(f"first division: fixed step t = {np.mean(first_leg):.2f}, events t = {np.mean(first_ev):.4f}")
+    print(f"divisions per run over {n_runs} runs: fixed step {np.mean(count_leg):.2f} "
+          f"+- {np.std(count_leg) / np.sqrt(n_runs):.2f}, events {np.mean(count_ev):.2f} "
+          f"+- {np.std(count_ev) / np.sqrt(n_runs):.2f}")
\ No newline at end of file
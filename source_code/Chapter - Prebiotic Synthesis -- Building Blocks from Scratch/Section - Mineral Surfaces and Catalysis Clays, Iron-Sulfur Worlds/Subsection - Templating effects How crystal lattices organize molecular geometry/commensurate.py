@@ -17,6 +17,80 @@ def best_registry(a1: np.ndarray, a2: np.ndarray, b: np.ndarray, max_index: int
     delta = best[2] / np.linalg.norm(a1)
     return best[0], best[1], delta, best[3]
 
+def lagrange_reduce(A1, A2):
+    """
+    Lagrange (2D LLL) reduction of one or many bases, vectorised over the leading axis.
+    A1, A2: (..., 2) basis vectors. Returns (R1, R2, U) with |R1| <= |R2|,
+    |R1.R2| <= |R1|^2 / 2 and [R1 R2] = [A1 A2] @ U for unimodular integer U (..., 2, 2).
+    """
+    R1 = np.array(A1, dtype=float, copy=True)
+    R2 = np.array(A2, dtype=float, copy=True)
+    if np.any(np.abs(R1[..., 0] * R2[..., 1] - R1[..., 1] * R2[..., 0]) == 0):
+        raise ValueError("Degenerate lattice basis")
+    U = np.zeros(R1.shape[:-1] + (2, 2), dtype=np.int64)
+    U[..., 0, 0] = U[..., 1, 1] = 1
+    while True:
+        swap = np.einsum('...i,...i', R2, R2) < np.einsum('...i,...i', R1, R1)
+        R1[swap], R2[swap] = R2[swap], R1[swap].copy()
+        U[swap] = U[swap][..., ::-1]
+        mu = np.rint(np.einsum('...i,...i', R1, R2) / np.einsum('...i,...i', R1, R1))
+        if not np.any(mu):
+            return R1, R2, U
+        R2 -= mu[..., None] * R1
+        U[..., :, 1] -= mu[..., None].astype(np.int64) * U[..., :, 0]
+
+# Offsets around floor(coordinates in the reduced basis); for a Lagrange-reduced
+# basis the closest lattice vector is among them.
+_OFFSETS = np.array([(i, j) for i in range(-1, 3) for j in range(-1, 3)])
+
+def best_registry_batch(A1, A2, B, max_index: int = 10, chunk: int = 2**16):
+    """
+    best_registry for every substrate lattice (A1[s], A2[s]) against every
+    adsorbate vector B[k] at once. A1, A2: (S, 2); B: (K, 2).
+    Returns n, m, delta (S, K) and vec (S, K, 2). The closest lattice vector is
+    found by Lagrange reduction plus a 4x4 local search; pairs whose optimum lies
+    outside |n|, |m| <= max_index fall back to a vectorised scan of the box.
+    Substrates are processed in blocks of about `chunk` pairs to bound memory.
+    """
+    A1 = np.atleast_2d(np.asarray(A1, dtype=float))
+    A2 = np.atleast_2d(np.asarray(A2, dtype=float))
+    B = np.atleast_2d(np.asarray(B, dtype=float))
+    step = max(1, chunk // len(B))
+    if len(A1) > step:
+        parts = [best_registry_batch(A1[i:i + step], A2[i:i + step], B, max_index, chunk)
+                 for i in range(0, len(A1), step)]
+        return tuple(np.concatenate(p) for p in zip(*parts))
+    R1, R2, U = lagrange_reduce(A1, A2)
+    # coordinates of every b in each reduced basis
+    Rinv = np.linalg.inv(np.stack([R1, R2], axis=-1))                  # (S, 2, 2)
+    coords = np.einsum('sij,kj->ski', Rinv, B)                          # (S, K, 2)
+    cand = np.floor(coords)[:, :, None, :] + _OFFSETS                   # (S, K, 16, 2)
+    nm = np.einsum('sij,skcj->skci', U, cand.astype(np.int64))          # back to (n, m)
+    # order candidates by (n, m) so ties resolve as in the best_registry loop
+    order = np.lexsort((nm[..., 1], nm[..., 0]), axis=-1)
+    nm = np.take_along_axis(nm, order[..., None], axis=2)
+    vec = nm[..., 0, None] * A1[:, None, None, :] + nm[..., 1, None] * A2[:, None, None, :]
+    d = np.linalg.norm(vec - B[None, :, None, :], axis=-1)
+    best = np.argmin(d, axis=-1)
+    take = lambda x: np.take_along_axis(x, best[..., None, None], axis=2)[:, :, 0]
+    nm_best, vec_best = take(nm), take(vec)
+    dist = np.take_along_axis(d, best[..., None], axis=2)[..., 0]
+    outside = np.abs(nm_best).max(axis=-1) > max_index
+    if np.any(outside):
+        r = np.arange(-max_index, max_index + 1)
+        grid = np.stack(np.meshgrid(r, r, indexing='ij'), axis=-1).reshape(-1, 2)
+        for s, k in zip(*np.nonzero(outside)):
+            v = grid[:, :1] * A1[s] + grid[:, 1:] * A2[s]
+            j = np.argmin(np.linalg.norm(v - B[k], axis=1))
+            nm_best[s, k], vec_best[s, k], dist[s, k] = grid[j], v[j], np.linalg.norm(v[j] - B[k])
+    delta = dist / np.linalg.norm(A1, axis=1)[:, None]
+    return nm_best[..., 0], nm_best[..., 1], delta, vec_best
+
+def best_registry_fast(a1: np.ndarray, a2: np.ndarray, b: np.ndarray, max_index: int = 10):
+    # drop-in replacement for best_registry; cost independent of max_index
+    n, m, delta, vec = best_registry_batch(a1, a2, b, max_index)
+    return int(n[0, 0]), int(m[0, 0]), float(delta[0, 0]), vec[0, 0]
+
 # Example usage: substrate square lattice a=5.0 A, adsorbate spacing b=(7.1,0)
 if __name__ == "__main__":
     a = 5.0
@@ -24,4 +98,15 @@ if __name__ == "__main__":
     a2 = np.array([0.0, a])
     b = np.array([7.1, 0.0])
     n, m, delta, vec = best_registry(a1, a2, b)
-    print(f"best (n,m)=({n},{m}), delta={delta:.3f}, vec={vec}")
\ No newline at end of file
+    print(f"best (n,m)=({n},{m}), delta={delta:.3f}, vec={vec}")
+    print("reduced-basis solver:", best_registry_fast(a1, a2, b))
+
+    # Screening: 2000 random substrate lattices against 500 adsorbate vectors.
+    rng = np.random.default_rng(0)
+    S, K = 2000, 500
+    ang = rng.uniform(np.pi / 3, 2 * np.pi / 3, S)
+    A1 = np.column_stack([rng.uniform(3, 8, S), np.zeros(S)])
+    A2 = rng.uniform(3, 8, S)[:, None] * np.column_stack([np.cos(ang), np.sin(ang)])
+    B = rng.uniform(-40, 40, size=(K, 2))
+    n, m, delta, vec = best_registry_batch(A1, A2, B, max_index=50)
+    print(f"screened {S * K} pairs; best match delta={delta.min():.2e}")
\ No newline at end of file
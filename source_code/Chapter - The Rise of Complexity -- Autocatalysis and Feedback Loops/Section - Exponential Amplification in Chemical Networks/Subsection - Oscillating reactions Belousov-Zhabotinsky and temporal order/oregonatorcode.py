@@ -1,3 +1,5 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from scipy.integrate import solve_ivp
 # Production-ready RHS for the dimensionless Oregonator.
@@ -8,13 +10,193 @@ def oregonator(t, y, q=0.002, f=1.0, phi=0.1):
     dz = phi*(x - z)
     return [dx, dy, dz]
 
-# Example integration: parameter set near oscillatory regime.
-params = dict(q=0.002, f=1.4, phi=0.08)
-y0 = [0.1, 0.1, 0.1]            # small perturbation from steady state
-t_span = (0.0, 500.0)          # dimensionless time units
-t_eval = np.linspace(*t_span, 5000)
+def oregonator_jac(t, y, q=0.002, f=1.0, phi=0.1):
+    x, yb, z = y
+    return np.array([[1.0 - 2.0*x - yb, q - x, 0.0],
+                     [-yb, -q - x, f],
+                     [phi, 0.0, -phi]])
+
+def steady_state(q=0.002, f=1.0, phi=0.1):
+    # positive root of x^2 + (f + q - 1) x - q (1 + f) = 0; z = x, y = f x / (q + x)
+    b = f + q - 1.0
+    x = 0.5*(-b + np.sqrt(b*b + 4.0*q*(1.0 + f)))
+    return np.array([x, f*x/(q + x), x])
+
+# --- Oscillation analysis -------------------------------------------------
+# Poincare section: x crosses its steady-state value upwards. The transient is
+# integrated once at loose tolerance; the periodic orbit is then solved directly
+# by shooting (Newton on (y0, T) with the monodromy matrix from the variational
+# equations), so tight tolerances are only spent on a single period.
+
+def _section(params):
+    xs = steady_state(**params)[0]
+    event = lambda t, y: y[0] - xs
+    event.direction = 1
+    return event, xs
+
+def find_period(params, y0=(0.1, 0.1, 0.1), t_transient=500.0, n_cross=8,
+                t_max=2e4, rtol=1e-6, atol=1e-9, tol=1e-3):
+    """
+    Estimate the period from successive Poincare-section crossings.
+    Returns (T, y_section, converged); T is nan if the orbit decays to the
+    steady state.
+    """
+    rhs = lambda t, y: oregonator(t, y, **params)
+    jac = lambda t, y: oregonator_jac(t, y, **params)
+    event, _ = _section(params)
+    sol = solve_ivp(rhs, (0.0, t_transient), y0, method='LSODA', jac=jac,
+                    rtol=rtol, atol=atol)
+    y = sol.y[:, -1]
+    t0 = t_transient
+    ss = steady_state(**params)
+    times, points = [], []
+    while t0 < t_max:
+        sol = solve_ivp(rhs, (t0, min(t0 + t_transient, t_max)), y, method='LSODA',
+                        jac=jac, events=event, rtol=rtol, atol=atol)
+        times.extend(sol.t_events[0])
+        points.extend(sol.y_events[0])
+        y, t0 = sol.y[:, -1], sol.t[-1]
+        # a damped spiral also crosses the section, so the crossing points must
+        # settle at a finite distance from the steady state as well
+        dist = np.linalg.norm(np.array(points[-n_cross:] or [y]) - ss, axis=-1)
+        if dist[-1] < 1e3*rtol*(1.0 + np.linalg.norm(ss)):
+            return np.nan, y, True
+        if len(times) >= n_cross:
+            periods = np.diff(times[-n_cross:])
+            if np.ptp(periods) < tol*periods.mean() and np.ptp(dist) < tol*dist.mean():
+                return periods.mean(), np.array(points[-1]), True
+    if len(times) >= 2:
+        return np.diff(times)[-1], np.array(points[-1]), False
+    return np.nan, y, False
+
+def _variational(t, w, params):
+    y, Phi = w[:3], w[3:].reshape(3, 3)
+    J = oregonator_jac(t, y, **params)
+    return np.concatenate([oregonator(t, y, **params), (J @ Phi).ravel()])
+
+def monodromy(params, y0, T, rtol=1e-10, atol=1e-13):
+    # flow phi_T(y0) and its derivative d phi_T / d y0
+    w0 = np.concatenate([y0, np.eye(3).ravel()])
+    sol = solve_ivp(_variational, (0.0, T), w0, method='LSODA', args=(params,),
+                    rtol=rtol, atol=atol)
+    return sol.y[:3, -1], sol.y[3:, -1].reshape(3, 3)
+
+def shoot_orbit(params, y_guess, T_guess, tol=1e-9, max_iter=20):
+    """
+    Solve phi_T(y0) = y0 with the phase condition x(0) = x_ss for (y0, T).
+    Returns (y0, T, multipliers, converged); multipliers are the Floquet
+    multipliers (eigenvalues of the monodromy matrix, one of them ~1).
+    """
+    _, xs = _section(params)
+    y, T = np.array(y_guess, dtype=float), float(T_guess)
+    y[0] = xs
+    for _ in range(max_iter):
+        yT, M = monodromy(params, y, T)
+        r = np.append(yT - y, y[0] - xs)
+        J = np.zeros((4, 4))
+        J[:3, :3] = M - np.eye(3)
+        J[:3, 3] = oregonator(T, yT, **params)
+        J[3, 0] = 1.0
+        try:
+            d = np.linalg.solve(J, -r)
+        except np.linalg.LinAlgError:
+            break
+        y += d[:3]
+        T += d[3]
+        # give up rather than wander off to a multiple-period orbit
+        if abs(T - T_guess) > 0.5*T_guess or not np.all(np.isfinite(y)):
+            break
+        if np.linalg.norm(d) < tol*(1.0 + np.linalg.norm(y) + T):
+            _, M = monodromy(params, y, T)
+            return y, T, np.linalg.eigvals(M), True
+    return y, T, None, False
+
+def orbit_amplitude(params, y0, T, n=2000):
+    # peak-to-peak amplitude of each species over one period (log10 x is the usual readout)
+    sol = solve_ivp(lambda t, y: oregonator(t, y, **params), (0.0, T), y0,
+                    method='LSODA', jac=lambda t, y: oregonator_jac(t, y, **params),
+                    t_eval=np.linspace(0.0, T, n), rtol=1e-10, atol=1e-13)
+    return sol.y.max(axis=1) - sol.y.min(axis=1)
+
+def analyze(params, y0=(0.1, 0.1, 0.1), guess=None, **kw):
+    """
+    Period, amplitude and Floquet multipliers of the Oregonator limit cycle.
+    guess = (y_section, T) from a nearby parameter point skips the transient;
+    it falls back to find_period if shooting from the guess fails.
+    """
+    out = {'period': np.nan, 'amplitude': np.full(3, np.nan), 'multipliers': None,
+           'y0': None, 'oscillating': False}
+    res = shoot_orbit(params, *guess) if guess is not None else (None, None, None, False)
+    if not res[3]:
+        T, ys, _ = find_period(params, y0, **kw)
+        if not np.isfinite(T):
+            return out
+        res = shoot_orbit(params, ys, T)
+        if not res[3]:
+            return out
+    y, T, mult, _ = res
+    # shooting also converges to the (unstable) steady state with arbitrary T
+    if np.linalg.norm(y - steady_state(**params)) < 1e-6*(1.0 + np.linalg.norm(y)):
+        return out
+    out.update(period=T, amplitude=orbit_amplitude(params, y, T), multipliers=mult,
+               y0=y, oscillating=True)
+    return out
+
+def _analyze_line(args):
+    # walk one line of the grid, warm-starting each point from the previous orbit
+    q, f_vals, phi, kw = args
+    rows, guess = [], None
+    for f in f_vals:
+        r = analyze(dict(q=q, f=f, phi=phi), guess=guess, **kw)
+        guess = (r['y0'], r['period']) if r['oscillating'] else None
+        rows.append((r['period'], r['amplitude']))
+    return rows
+
+def period_map(q_vals, f_vals, phi_vals, workers=None, **kw):
+    """
+    Period and amplitude over the (q, f, phi) grid; lines along f are analysed in
+    parallel. Returns (period[nq, nf, nphi], amplitude[nq, nf, nphi, 3]).
+    """
+    q_vals, f_vals, phi_vals = map(np.atleast_1d, (q_vals, f_vals, phi_vals))
+    period = np.full((len(q_vals), len(f_vals), len(phi_vals)), np.nan)
+    amp = np.full(period.shape + (3,), np.nan)
+    lines = list(itertools.product(range(len(q_vals)), range(len(phi_vals))))
+    jobs = [(q_vals[i], f_vals, phi_vals[k], kw) for i, k in lines]
+    if len(jobs) == 1 or workers == 1:
+        results = [_analyze_line(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_analyze_line, jobs))
+    for (i, k), rows in zip(lines, results):
+        for j, (T, a) in enumerate(rows):
+            period[i, j, k] = T
+            amp[i, j, k] = a
+    return period, amp
+
+if __name__ == '__main__':
+    # Example integration: parameter set near oscillatory regime.
+    params = dict(q=0.002, f=1.4, phi=0.08)
+    y0 = [0.1, 0.1, 0.1]            # small perturbation from steady state
+    t_span = (0.0, 500.0)          # dimensionless time units
+    t_eval = np.linspace(*t_span, 5000)
+
+    sol = solve_ivp(lambda t, y: oregonator(t, y, **params),
+                    t_span, y0, t_eval=t_eval, rtol=1e-9, atol=1e-12)
+
+    # sol.t and sol.y contain time and concentrations for analysis or plotting.
 
-sol = solve_ivp(lambda t, y: oregonator(t, y, **params),
-                t_span, y0, t_eval=t_eval, rtol=1e-9, atol=1e-12)
+    # Oscillation analysis: period and amplitude of the limit cycle directly.
+    # f = 1.4 lies past the upper Hopf point (f ~ 1.27), so analyse f = 1.0.
+    res = analyze(dict(params, f=1.0), y0)
+    if res['oscillating']:
+        print(f"period = {res['period']:.6f}, amplitude = {res['amplitude']}, "
+              f"|multipliers| = {np.abs(res['multipliers'])}")
+    else:
+        print("no limit cycle: trajectory settles to the steady state")
 
-# sol.t and sol.y contain time and concentrations for analysis or plotting.
\ No newline at end of file
+    # Period map over (f, phi) in parallel; nan marks a stable steady state.
+    f_vals = np.linspace(0.5, 1.5, 11)
+    phi_vals = [0.08, 0.3]
+    period, amp = period_map([0.002], f_vals, phi_vals)
+    for f, T in zip(f_vals, period[0]):
+        print(f"f = {f:.2f}  T(phi) = {T}")
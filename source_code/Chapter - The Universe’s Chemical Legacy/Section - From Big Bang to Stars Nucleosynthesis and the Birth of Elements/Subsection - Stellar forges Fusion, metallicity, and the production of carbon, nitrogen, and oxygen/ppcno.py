@@ -1,4 +1,6 @@
+from functools import lru_cache
 import numpy as np
+from scipy.optimize import brentq
 
 # Physical scalings (illustrative): choose normalized constants
 eps0_pp = 1.0         # arbitrary units at T6=1
@@ -15,12 +17,129 @@ def eps_cno(T, Z, rho=rho, X=X):
     return eps0_cno * rho * X * Z * T6**18
 
 def crossover_temperature(Z, Tmin=5e6, Tmax=2e8):
+    # first grid temperature where CNO overtakes pp; None unless the ratio
+    # crosses 1 inside [Tmin, Tmax]
     Ts = np.logspace(np.log10(Tmin), np.log10(Tmax), 1000)
-    ratio = np.array([eps_cno(T, Z)/eps_pp(T) for T in Ts])
-    idx = np.argmax(ratio > 1.0)
-    return Ts[idx] if ratio.max() > 1.0 else None
-
-# Example: find crossover for solar metallicity and low metallicity
-for Z in (0.014, 1e-4):
-    Tcross = crossover_temperature(Z)
-    print(f"Z={Z:.3g}, crossover T ~ {Tcross:.2e} K")
\ No newline at end of file
+    ratio = eps_cno(Ts, Z)/eps_pp(Ts)
+    if ratio[0] > 1.0 or ratio.max() <= 1.0:
+        return None
+    return Ts[np.argmax(ratio > 1.0)]
+
+def eps_total(T, Z, rho=rho, X=X):
+    # broadcasts over any mix of T, Z, rho, X arrays
+    return eps_pp(T, rho, X) + eps_cno(T, Z, rho, X)
+
+def crossover_temperature_exact(Z, X=X):
+    """
+    Closed-form crossover for the power laws above, vectorised over Z and X:
+    eps_cno/eps_pp = (eps0_cno Z / (eps0_pp X)) T6^14 = 1 (rho cancels).
+    Unlike the grid search it is not limited to a temperature window.
+    nan where Z <= 0 (no CNO burning, no crossover).
+    """
+    Z, X_ = np.broadcast_arrays(np.asarray(Z, float), np.asarray(X, float))
+    out = np.full(Z.shape, np.nan)
+    ok = Z > 0
+    out[ok] = 1e6 * (eps0_pp * X_[ok] / (eps0_cno * Z[ok])) ** (1.0 / 14.0)
+    return out[()]
+
+def crossover_temperature_brent(Z, rho=rho, X=X, Tmin=1e5, Tmax=1e10,
+                                f_pp=eps_pp, f_cno=eps_cno, xtol=1e-12):
+    """
+    Crossover eps_cno = eps_pp for general rate laws f_pp(T, rho, X) and
+    f_cno(T, Z, rho, X): Brent's method on log(ratio) in log T for every
+    broadcast element of (Z, rho, X). nan where [Tmin, Tmax] does not bracket a root.
+    """
+    Z, rho_, X_ = np.broadcast_arrays(*(np.asarray(v, float) for v in (Z, rho, X)))
+    out = np.full(Z.shape, np.nan)
+    lo, hi = np.log(Tmin), np.log(Tmax)
+    for i in np.ndindex(Z.shape):
+        g = lambda lt: np.log(f_cno(np.exp(lt), Z[i], rho_[i], X_[i]) / f_pp(np.exp(lt), rho_[i], X_[i]))
+        if g(lo) * g(hi) <= 0:
+            out[i] = np.exp(brentq(g, lo, hi, xtol=xtol))
+    return out
+
+# --- Cached lookup tables -----------------------------------------------------------
+# Rates are tabulated per unit density (rho enters linearly) as log10(eps/rho) on
+# uniform grids in log T, log Z and optionally X, and read back by multilinear
+# interpolation with index arithmetic. Each pure power law is linear in the
+# log T and log Z axes, so only the X axis and the pp + CNO sum carry interpolation error.
+
+def _interp_uniform(values, lo, step, coords):
+    # multilinear interpolation on a uniform grid; coords (..., d), clamped to the grid
+    d = values.ndim
+    f = (coords - lo) / step
+    i0 = np.clip(np.floor(f).astype(np.intp), 0, np.array(values.shape) - 2)
+    w = np.clip(f - i0, 0.0, 1.0)
+    out = 0.0
+    for corner in range(2 ** d):
+        bits = [(corner >> k) & 1 for k in range(d)]
+        idx = tuple(i0[..., k] + bits[k] for k in range(d))
+        wt = np.prod([w[..., k] if bits[k] else 1.0 - w[..., k] for k in range(d)], axis=0)
+        out = out + wt * values[idx]
+    return out
+
+@lru_cache(maxsize=32)
+def rate_table(kind='total', T_range=(5e6, 2e8), Z_range=(1e-6, 0.05), X_range=None,
+               shape=(512, 128, 32)):
+    """
+    Build (once per argument set) a lookup f(T, Z, rho=rho, X=None) for kind in
+    'pp', 'cno', 'total'. 2D (log T, log Z) at the module X when X_range is None,
+    else 3D (log T, log Z, X). Arguments must be hashable (tuples). Queries outside
+    the tabulated ranges return nan; a 2D table raises ValueError for any other X.
+    """
+    rate = {'pp': lambda T, Z, X_: eps_pp(T, 1.0, X_),
+            'cno': lambda T, Z, X_: eps_cno(T, Z, 1.0, X_),
+            'total': lambda T, Z, X_: eps_total(T, Z, 1.0, X_)}[kind]
+    axes = [np.linspace(np.log10(T_range[0]), np.log10(T_range[1]), shape[0]),
+            np.linspace(np.log10(Z_range[0]), np.log10(Z_range[1]), shape[1])]
+    if X_range is not None:
+        axes.append(np.linspace(X_range[0], X_range[1], shape[2]))
+    grid = np.meshgrid(*axes, indexing='ij')
+    X_table = X
+    X_grid = grid[2] if X_range is not None else X_table
+    values = np.log10(rate(10.0 ** grid[0], 10.0 ** grid[1], X_grid))
+    lo = np.array([a[0] for a in axes])
+    step = np.array([a[1] - a[0] for a in axes])
+    ranges = [T_range, Z_range] + ([X_range] if X_range is not None else [])
+
+    def lookup(T, Z, rho=rho, X=None):
+        if X_range is None:
+            if X is not None and np.any(np.asarray(X) != X_table):
+                raise ValueError(f"2D table was built at X={X_table}; pass X_range for other X")
+            cols = [T, Z]
+        else:
+            cols = [T, Z, X_table if X is None else X]
+        cols = np.broadcast_arrays(*(np.asarray(c, float) for c in cols))
+        outside = np.zeros(cols[0].shape, dtype=bool)
+        for c, (a, b) in zip(cols, ranges):
+            outside |= (c < a) | (c > b)
+        coords = np.stack([np.log10(cols[0]), np.log10(cols[1])] + list(cols[2:]), axis=-1)
+        out = rho * 10.0 ** _interp_uniform(values, lo, step, coords)
+        return np.where(outside, np.nan, out)
+    return lookup
+
+if __name__ == "__main__":
+    # Example: find crossover for solar metallicity and low metallicity
+    # (with these scalings both crossovers lie below 5e6 K, so widen the window)
+    for Z in (0.014, 1e-4):
+        Tcross = crossover_temperature(Z, Tmin=1e6)
+        print(f"Z={Z:.3g}, crossover T ~ {Tcross:.2e} K")
+
+    # Exact crossover over a metallicity sweep, checked against Brent.
+    Zs = np.logspace(-6, np.log10(0.05), 8)
+    T_exact = crossover_temperature_exact(Zs)
+    T_brent = crossover_temperature_brent(Zs)
+    for Z, Te, Tb in zip(Zs, T_exact, T_brent):
+        print(f"Z={Z:.2e}: closed form {Te:.6e} K, Brent {Tb:.6e} K")
+
+    # Cached 3D table queried a million times.
+    rng = np.random.default_rng(0)
+    n = 10**6
+    T = 10 ** rng.uniform(np.log10(5e6), np.log10(2e8), n)
+    Z = 10 ** rng.uniform(-6, np.log10(0.05), n)
+    Xs = rng.uniform(0.6, 0.75, n)
+    rhos = rng.uniform(1.0, 150.0, n)
+    table = rate_table('total', X_range=(0.6, 0.75))
+    approx = table(T, Z, rhos, Xs)
+    exact = eps_total(T, Z, rhos, Xs)
+    print(f"table vs direct: max rel err {np.max(np.abs(approx / exact - 1)):.2e}")
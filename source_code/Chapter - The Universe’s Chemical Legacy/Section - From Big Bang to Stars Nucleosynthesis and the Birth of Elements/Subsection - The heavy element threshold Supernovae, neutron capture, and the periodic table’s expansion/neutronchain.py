@@ -1,5 +1,8 @@
 import numpy as np
+import scipy.sparse as sp
 from scipy.integrate import solve_ivp
+from scipy.linalg import expm
+from scipy.sparse.linalg import expm_multiply
 
 def integrate_chain(A_min, A_max, Yn0, n_n, sigma_v, decay_rates, t_span):
     """
@@ -25,4 +28,131 @@ def integrate_chain(A_min, A_max, Yn0, n_n, sigma_v, decay_rates, t_span):
     sol = solve_ivp(dydt, t_span, Yn0, dense_output=True, atol=1e-12, rtol=1e-9)
     return sol.t, sol.y
 
-# Example usage: s-process-like parameters (low n_n) vs r-process-like (high n_n).
\ No newline at end of file
+# --- Sparse network solver -------------------------------------------------------
+# The network is linear in Y: dY/dt = (n_n(t) C + D) Y, with C the neutron-capture
+# part per unit neutron density and D the decay part. Both are assembled once as
+# sparse matrices, so the RHS is a sparse mat-vec and the Jacobian is the matrix
+# itself. For a chain C and D are lower bidiagonal / diagonal.
+
+def chain_parts(sigma_v, decay_rates):
+    # capture (A -> A+1) and decay (loss only) matrices for a linear chain
+    sigma_v = np.asarray(sigma_v, float)
+    decay_rates = np.asarray(decay_rates, float)
+    C = sp.diags([-sigma_v, sigma_v[:-1]], [0, -1], format='csr')
+    D = sp.diags(-decay_rates, 0, format='csr')
+    return C, D
+
+def grid_parts(sigma_v, decay_rates, pn=None):
+    """
+    Capture and decay matrices on a (Z, A) grid; arrays are (nZ, nA) with
+    index Z_min + i, A_min + j, flattened as i * nA + j. Capture moves (Z, A)
+    to (Z, A+1); beta decay moves (Z, A) to (Z+1, A), or with probability pn
+    (beta-delayed neutron emission) to (Z+1, A-1). Flows leaving the grid are lost.
+    """
+    sigma_v = np.asarray(sigma_v, float)
+    decay_rates = np.asarray(decay_rates, float)
+    pn = np.zeros_like(decay_rates) if pn is None else np.asarray(pn, float)
+    nZ, nA = sigma_v.shape
+    idx = np.arange(nZ * nA).reshape(nZ, nA)
+
+    def transfer(rate, src, dst):
+        # rows/cols/values for loss at src and gain at dst (dst None where off-grid)
+        rows, cols, vals = [src.ravel()], [src.ravel()], [-rate.ravel()]
+        if dst is not None:
+            ok = dst >= 0
+            rows.append(dst[ok]); cols.append(src[ok]); vals.append(rate[ok])
+        return rows, cols, vals
+
+    def assemble(parts):
+        r, c, v = (np.concatenate(sum((p[k] for p in parts), [])) for k in range(3))
+        return sp.csr_matrix((v, (r, c)), shape=(nZ * nA, nZ * nA))
+
+    to_cap = np.full_like(idx, -1); to_cap[:, :-1] = idx[:, 1:]
+    to_beta = np.full_like(idx, -1); to_beta[:-1, :] = idx[1:, :]
+    to_bdn = np.full_like(idx, -1); to_bdn[:-1, 1:] = idx[1:, :-1]
+    C = assemble([transfer(sigma_v, idx, to_cap)])
+    D = assemble([transfer(decay_rates * (1 - pn), idx, to_beta),
+                  transfer(decay_rates * pn, idx, to_bdn)])
+    return C, D
+
+def integrate_network(C, D, Y0, n_n, t_span, t_eval=None, rtol=1e-9, atol=1e-12,
+                      method='BDF'):
+    """
+    Integrate dY/dt = (n_n C + D) Y with the sparse Jacobian supplied.
+    n_n may be a constant or a callable n_n(t) (e.g. an r-process freeze-out).
+    Returns the solve_ivp solution.
+    """
+    if callable(n_n):
+        rhs = lambda t, Y: n_n(t) * (C @ Y) + D @ Y
+        jac = lambda t, Y: (n_n(t) * C + D).tocsc()
+    else:
+        M = (n_n * C + D).tocsc()
+        rhs = lambda t, Y: M @ Y
+        jac = M
+    return solve_ivp(rhs, t_span, Y0, method=method, jac=jac, t_eval=t_eval,
+                     rtol=rtol, atol=atol)
+
+def integrate_chain_fast(A_min, A_max, Yn0, n_n, sigma_v, decay_rates, t_span):
+    # drop-in for integrate_chain: vectorised RHS, sparse bidiagonal Jacobian, BDF
+    if len(sigma_v) != A_max - A_min + 1:
+        raise ValueError("sigma_v length must equal A_max - A_min + 1")
+    C, D = chain_parts(sigma_v, decay_rates)
+    sol = integrate_network(C, D, np.asarray(Yn0, float), n_n, t_span)
+    return sol.t, sol.y
+
+def network_expm(C, D, Y0, n_n, times, dense_max=2000):
+    """
+    Exact solution Y(t) = expm((n_n C + D) t) Y0 at the given times (constant n_n),
+    i.e. the Bateman solution for a chain, without the ill-conditioning of the
+    closed form when rates nearly coincide. Networks up to dense_max species use
+    dense scaling-and-squaring, whose cost grows only with log(|M| t), so stiff
+    r-process timescales cost no more than short ones; larger networks use
+    expm_multiply. Returns Y with shape (n, len(times)).
+    """
+    M = n_n * C + D
+    Y0 = np.asarray(Y0, float)
+    times = np.atleast_1d(np.asarray(times, float))
+    if M.shape[0] <= dense_max:
+        Md = M.toarray()
+        return np.column_stack([expm(Md * t) @ Y0 for t in times])
+    M = M.tocsc()
+    order = np.argsort(times)
+    Y = np.empty((len(Y0), len(times)))
+    y, t_prev = Y0, 0.0
+    for k in order:
+        # propagate from the previous output time
+        y = expm_multiply(M * (times[k] - t_prev), y)
+        Y[:, k] = y
+        t_prev = times[k]
+    return Y
+
+if __name__ == "__main__":
+    # Chain A = 56..209: smooth cross-sections, mostly stable isotopes with an
+    # unstable branch point every tenth mass number.
+    A_min, A_max = 56, 209
+    A = np.arange(A_min, A_max + 1)
+    rng = np.random.default_rng(0)
+    sigma_v = 1e-17 * (A / 100.0) ** 2 * rng.lognormal(0, 0.5, len(A))   # cm^3 s^-1
+    decay_rates = np.where(A % 10 == 5, 1e-9, 0.0)                       # s^-1
+    Y0 = np.zeros(len(A)); Y0[0] = 1.0
+    C, D = chain_parts(sigma_v, decay_rates)
+    # Example usage: s-process-like parameters (low n_n) vs r-process-like (high n_n).
+    for label, n_n, tf in [("s-process", 1e8, 1e11), ("r-process", 1e22, 1e-3)]:
+        sol_t, sol_y = integrate_chain_fast(A_min, A_max, Y0, n_n, sigma_v, decay_rates, (0.0, tf))
+        Y_exact = network_expm(C, D, Y0, n_n, [tf])[:, 0]
+        A_mean = (A * Y_exact).sum() / Y_exact.sum()
+        print(f"{label}: <A> = {A_mean:.1f}, surviving = {Y_exact.sum():.3f}, "
+              f"BDF steps = {len(sol_t)}, max |BDF - expm| = {np.abs(sol_y[:, -1] - Y_exact).max():.2e}")
+
+    # (Z, A) grid with beta decay to Z+1 and 5% beta-delayed neutron emission,
+    # neutron density freezing out on a 0.5 s timescale.
+    nZ, nA = 30, 120
+    sv = np.full((nZ, nA), 1e-17)
+    lam = np.tile(np.linspace(0.0, 50.0, nA), (nZ, 1)) * np.linspace(0.2, 1.0, nZ)[:, None]
+    C, D = grid_parts(sv, lam, pn=np.full((nZ, nA), 0.05))
+    Y0 = np.zeros(nZ * nA); Y0[0] = 1.0
+    sol = integrate_network(C, D, Y0, lambda t: 1e19 * np.exp(-t / 0.5), (0.0, 5.0))
+    Yf = sol.y[:, -1].reshape(nZ, nA)
+    print(f"grid: {nZ * nA} species, {C.nnz + D.nnz} couplings, <Z - Z_min> = "
+          f"{(np.arange(nZ) * Yf.sum(1)).sum() / Yf.sum():.2f}, <A - A_min> = "
+          f"{(np.arange(nA) * Yf.sum(0)).sum() / Yf.sum():.2f}, steps = {len(sol.t)}")
@@ -32,10 +32,21 @@ def dydt(t, y):
     dnH = -rate_cx - rate_h2form   # neutral H lost to reactions (approx.)
     return [dnH, dnHp, dnH2p, dnHeH, dne]
 
-y0 = [nH, nHp, 0.0, 0.0, ne]
-t_span = (0.0, 1e13)  # seconds; choose timescale relevant to problem
-sol = solve_ivp(dydt, t_span, y0, method='BDF', rtol=1e-6, atol=1e-12)
+def jac(t, y):
+    # analytic Jacobian of dydt, so BDF does not difference the RHS per column
+    nH, nHp, nH2p, nHeH, ne = y
+    return np.array([
+        [-k_cx*nHeH - k1*nH2p, 0.0, -k1*nH, -k_cx*nH, 0.0],
+        [k1*nH2p, -k_ra*nHe, k1*nH, 0.0, 0.0],
+        [k_cx*nHeH - k1*nH2p, 0.0, -k1*nH, k_cx*nH, 0.0],
+        [-k_cx*nHeH, k_ra*nHe, 0.0, -k_cx*nH - alpha_dr*ne, -alpha_dr*nHeH],
+        [0.0, 0.0, 0.0, -alpha_dr*ne, -alpha_dr*nHeH]])
+
+if __name__ == "__main__":
+    y0 = [nH, nHp, 0.0, 0.0, ne]
+    t_span = (0.0, 1e13)  # seconds; choose timescale relevant to problem
+    sol = solve_ivp(dydt, t_span, y0, method='BDF', jac=jac, rtol=1e-6, atol=1e-12)
 
-# Example output: final HeH+ fraction relative to He
-nHeH_final = sol.y[3, -1]
-print("HeH+ fraction of He:", nHeH_final / nHe)
\ No newline at end of file
+    # Example output: final HeH+ fraction relative to He
+    nHeH_final = sol.y[3, -1]
+    print("HeH+ fraction of He:", nHeH_final / nHe)
\ No newline at end of file